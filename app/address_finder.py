@@ -3,11 +3,15 @@ import os
 import sys
 import argparse
 import json
-from typing import List, Dict, Optional
+from typing import List, Optional, Iterable, Iterator, Tuple
 from pattern_matcher import PatternMatcher
+from result_writer import BeautifulResult, ResultSummary, StreamingResultWriter
 import glob
+import itertools
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+# Сколько строк дампа обрабатывается одной пачкой
+CHUNK_SIZE = 4096
 
 class AddressFinder:
     """Класс для поиска красивых адресов в существующих файлах"""
@@ -15,68 +19,157 @@ class AddressFinder:
     def __init__(self, pattern_matcher: PatternMatcher):
         self.matcher = pattern_matcher
         self.results = []
+        # FeatureCacheBuilder: если задан, получает признаки всех просканированных адресов
+        self.feature_builder = None
     
-    def scan_file(self, filename: str, min_score: int = 50) -> List[Dict]:
-        """Сканирует файл и находит красивые адреса"""
-        beautiful_addresses = []
+    @staticmethod
+    def parse_line(line: str) -> Optional[Tuple[str, str]]:
+        """Извлекает адрес и приватный ключ из строки дампа"""
+        if "Address:" in line and "PrivateKey:" in line:
+            parts = line.split(',')
+            if len(parts) >= 2:
+                address_part = parts[0].split(':', 1)
+                key_part = parts[1].split(':', 1)
+                
+                if len(address_part) == 2 and len(key_part) == 2:
+                    return address_part[1].strip(), key_part[1].strip()
+        return None
+    
+    def _process_chunk(self, filename: str, chunk: List[Tuple[int, str, str]], min_score: int,
+                       validate: bool) -> Tuple[List[BeautifulResult], int]:
+        """Анализирует пачку строк; возвращает красивые адреса и число невалидных"""
+        invalid = 0
+        if validate:
+            # Проверка контрольных сумм пачкой (numpy)
+            from base58_batch import decode_batch
+            _, valid = decode_batch([address for _, address, _ in chunk])
+            invalid = len(chunk) - int(valid.sum())
+            if invalid:
+                chunk = [entry for entry, ok in zip(chunk, valid) if ok]
+        
+        results = []
+        for line_num, address, private_key in chunk:
+            # Анализируем адрес
+            analysis = self.matcher.analyze_address(address)
+            
+            if self.feature_builder is not None:
+                self.feature_builder.add(filename, line_num, address, private_key, analysis["features"])
+            
+            if analysis["score"] >= min_score:
+                results.append(BeautifulResult(
+                    filename,
+                    line_num,
+                    address,
+                    private_key,
+                    analysis["score"],
+                    BeautifulResult.compact_patterns(analysis["patterns_found"])
+                ))
+        return results, invalid
+    
+    def iter_file(self, filename: str, min_score: int = 50, validate: bool = False) -> Iterator[BeautifulResult]:
+        """Потоково сканирует файл и выдаёт красивые адреса по одному.
         
+        Строки обрабатываются пачками по CHUNK_SIZE; при validate=True адреса
+        с неверной контрольной суммой Base58Check пропускаются.
+        """
         if not os.path.exists(filename):
             print(f"Файл {filename} не найден")
-            return beautiful_addresses
+            return
         
         print(f"Сканирование файла: {filename}")
         line_count = 0
+        found_count = 0
+        invalid_count = 0
+        chunk = []
         
         try:
             with open(filename, 'r') as f:
                 for line_num, line in enumerate(f, 1):
                     line_count += 1
                     line = line.strip()
-                    if not line:
-                        continue
+                    if line:
+                        # Извлекаем адрес и приватный ключ
+                        parsed = self.parse_line(line)
+                        if parsed:
+                            chunk.append((line_num, parsed[0], parsed[1]))
                     
-                    # Извлекаем адрес и приватный ключ
-                    if "Address:" in line and "PrivateKey:" in line:
-                        parts = line.split(',')
-                        if len(parts) >= 2:
-                            address_part = parts[0].split(':', 1)
-                            key_part = parts[1].split(':', 1)
-                            
-                            if len(address_part) == 2 and len(key_part) == 2:
-                                address = address_part[1].strip()
-                                private_key = key_part[1].strip()
-                                
-                                # Анализируем адрес
-                                analysis = self.matcher.analyze_address(address)
-                                
-                                if analysis["score"] >= min_score:
-                                    result = {
-                                        "file": filename,
-                                        "line": line_num,
-                                        "address": address,
-                                        "private_key": private_key,
-                                        "score": analysis["score"],
-                                        "patterns": analysis["patterns_found"]
-                                    }
-                                    beautiful_addresses.append(result)
+                    if len(chunk) >= CHUNK_SIZE:
+                        results, invalid = self._process_chunk(filename, chunk, min_score, validate)
+                        chunk = []
+                        invalid_count += invalid
+                        found_count += len(results)
+                        yield from results
                     
                     # Показываем прогресс каждые 10000 строк
                     if line_count % 10000 == 0:
-                        print(f"  Обработано {line_count} строк, найдено {len(beautiful_addresses)} красивых адресов")
+                        print(f"  Обработано {line_count} строк, найдено {found_count} красивых адресов")
+                
+                if chunk:
+                    results, invalid = self._process_chunk(filename, chunk, min_score, validate)
+                    invalid_count += invalid
+                    found_count += len(results)
+                    yield from results
         
         except Exception as e:
             print(f"Ошибка при чтении файла {filename}: {e}")
         
-        print(f"  Всего обработано {line_count} строк, найдено {len(beautiful_addresses)} красивых адресов")
-        return beautiful_addresses
+        print(f"  Всего обработано {line_count} строк, найдено {found_count} красивых адресов")
+        if invalid_count:
+            print(f"  Пропущено адресов с неверной контрольной суммой: {invalid_count}")
     
-    def scan_directory(self, directory: str = None, pattern: str = "addresses*.txt", min_score: int = 50) -> List[Dict]:
-        """Сканирует все файлы адресов в директории и подпапках"""
+    def iter_live_file(self, filename: str, min_score: int = 50, validate: bool = False) -> Iterator[BeautifulResult]:
+        """Сканирует JSON со списком адресов (beautiful_live.json); строка - номер записи"""
+        if not os.path.exists(filename):
+            print(f"Файл {filename} не найден")
+            return
+        
+        print(f"Сканирование файла: {filename}")
+        try:
+            with open(filename, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except Exception as e:
+            print(f"Ошибка при чтении файла {filename}: {e}")
+            return
+        
+        found_count = 0
+        for start in range(0, len(entries), CHUNK_SIZE):
+            chunk = [(start + i + 1, entry["address"], entry["private_key"])
+                     for i, entry in enumerate(entries[start:start + CHUNK_SIZE])]
+            results, _ = self._process_chunk(filename, chunk, min_score, validate)
+            found_count += len(results)
+            yield from results
+        
+        print(f"  Всего обработано {len(entries)} записей, найдено {found_count} красивых адресов")
+    
+    def iter_segments(self, directory: str, min_score: int = 50, validate: bool = False) -> Iterator[BeautifulResult]:
+        """Сканирует архив сегментов без дубликатов (см. dump_compactor.py); строка - номер записи сегмента"""
+        from dump_compactor import SegmentStore, segment_path
+        store = SegmentStore(directory)
+        print(f"Сканирование архива сегментов: {directory} ({store.count:,} адресов)")
+        found_count = 0
+        for shard in range(store.num_shards):
+            filename = segment_path(directory, shard)
+            records = enumerate(store.iter_shard(shard), 1)
+            while True:
+                chunk = [(line_num, address, private_key)
+                         for line_num, (address, private_key) in itertools.islice(records, CHUNK_SIZE)]
+                if not chunk:
+                    break
+                results, _ = self._process_chunk(filename, chunk, min_score, validate)
+                found_count += len(results)
+                yield from results
+        
+        print(f"  Всего обработано {store.count} адресов, найдено {found_count} красивых адресов")
+    
+    def scan_file(self, filename: str, min_score: int = 50, validate: bool = False) -> List[BeautifulResult]:
+        """Сканирует файл и находит красивые адреса"""
+        return list(self.iter_file(filename, min_score, validate))
+    
+    def find_files(self, directory: str = None, pattern: str = "addresses*.txt") -> List[str]:
+        """Возвращает отсортированный список файлов адресов в директории и подпапках"""
         if directory is None:
             directory = os.path.join(BASE_DIR, "addresses")
         
-        all_results = []
-        
         # Список директорий для поиска
         search_dirs = [
             directory,
@@ -98,101 +191,76 @@ class AddressFinder:
                 all_files.extend(recursive_files)
         
         # Убираем дубликаты
-        all_files = list(set(all_files))
+        all_files = sorted(set(all_files))
         
         if not all_files:
             print(f"Файлы по паттерну {pattern} не найдены")
-            return all_results
+            return all_files
         
         print(f"Найдено файлов для сканирования: {len(all_files)}")
         print(f"Директории поиска: {', '.join(search_dirs)}")
-        
-        for file_path in sorted(all_files):
-            results = self.scan_file(file_path, min_score)
-            all_results.extend(results)
-        
-        return all_results
+        return all_files
+    
+    def iter_directory(self, directory: str = None, pattern: str = "addresses*.txt", min_score: int = 50,
+                       validate: bool = False) -> Iterator[BeautifulResult]:
+        """Потоково сканирует все файлы адресов в директории и подпапках"""
+        for file_path in self.find_files(directory, pattern):
+            yield from self.iter_file(file_path, min_score, validate)
     
-    def filter_by_pattern_type(self, results: List[Dict], pattern_type: str) -> List[Dict]:
+    def scan_directory(self, directory: str = None, pattern: str = "addresses*.txt", min_score: int = 50,
+                       validate: bool = False) -> List[BeautifulResult]:
+        """Сканирует все файлы адресов в директории и подпапках"""
+        return list(self.iter_directory(directory, pattern, min_score, validate))
+    
+    def filter_by_pattern_type(self, results: Iterable[BeautifulResult], pattern_type: str) -> Iterator[BeautifulResult]:
         """Фильтрует результаты по типу паттерна"""
-        filtered = []
         for result in results:
-            for pattern in result["patterns"]:
-                if pattern["type"] == pattern_type:
-                    filtered.append(result)
+            for pattern in result.patterns:
+                if pattern[0] == pattern_type:
+                    yield result
                     break
-        return filtered
     
-    def filter_by_word(self, results: List[Dict], word: str) -> List[Dict]:
+    def filter_by_word(self, results: Iterable[BeautifulResult], word: str) -> Iterator[BeautifulResult]:
         """Фильтрует результаты по наличию слова"""
-        filtered = []
         word_upper = word.upper()
         for result in results:
-            if word_upper in result["address"].upper():
-                filtered.append(result)
-        return filtered
+            if word_upper in result.address.upper():
+                yield result
     
-    def save_results(self, results: List[Dict], output_file: str):
-        """Сохраняет результаты в файл"""
+    def save_results(self, results: Iterable[BeautifulResult], output_file: str, run_size: int = 100000) -> ResultSummary:
+        """Потоково сохраняет результаты в файл и возвращает сводку"""
         output_path = os.path.join(BASE_DIR, "addresses", output_file)
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
         
-        # Сохраняем в JSON формате для программной обработки
-        json_file = output_path.replace('.txt', '.json')
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump(results, f, indent=2, ensure_ascii=False)
+        # JSON пишется по мере поступления, текстовый отчёт - через внешнюю сортировку
+        with StreamingResultWriter(output_path, run_size) as writer:
+            summary = writer.write_all(results)
         
-        # Сохраняем в читаемом текстовом формате
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(f"Найдено красивых адресов: {len(results)}\n")
-            f.write("=" * 80 + "\n\n")
-            
-            # Сортируем по score
-            sorted_results = sorted(results, key=lambda x: x["score"], reverse=True)
-            
-            for i, result in enumerate(sorted_results, 1):
-                f.write(f"#{i} Адрес: {result['address']}\n")
-                f.write(f"Приватный ключ: {result['private_key']}\n")
-                f.write(f"Оценка: {result['score']}\n")
-                f.write(f"Файл: {result['file']}, строка: {result['line']}\n")
-                f.write("Найденные паттерны:\n")
-                for pattern in result["patterns"]:
-                    f.write(f"  - {pattern['type']}: {pattern['pattern']} (score: {pattern['score']})\n")
-                f.write("-" * 80 + "\n\n")
-        
-        print(f"\nРезультаты сохранены в:")
-        print(f"  - {output_path} (текстовый формат)")
-        print(f"  - {json_file} (JSON формат)")
-    
-    def print_summary(self, results: List[Dict]):
+        if summary.count:
+            print(f"\nРезультаты сохранены в:")
+            print(f"  - {output_path} (текстовый формат)")
+            print(f"  - {writer.json_file} (JSON формат)")
+        return summary
+    
+    def print_summary(self, summary: ResultSummary):
         """Выводит сводку найденных адресов"""
-        if not results:
+        if not summary.count:
             print("\nКрасивых адресов не найдено")
             return
         
         print(f"\n{'='*80}")
-        print(f"СВОДКА: Найдено {len(results)} красивых адресов")
+        print(f"СВОДКА: Найдено {summary.count} красивых адресов")
         print(f"{'='*80}\n")
         
         # Статистика по типам паттернов
-        pattern_stats = {}
-        for result in results:
-            for pattern in result["patterns"]:
-                ptype = pattern["type"]
-                if ptype not in pattern_stats:
-                    pattern_stats[ptype] = 0
-                pattern_stats[ptype] += 1
-        
         print("Статистика по типам паттернов:")
-        for ptype, count in sorted(pattern_stats.items(), key=lambda x: x[1], reverse=True):
+        for ptype, count in sorted(summary.pattern_stats.items(), key=lambda x: x[1], reverse=True):
             print(f"  - {ptype}: {count} адресов")
         
         # Топ-10 адресов по score
-        sorted_results = sorted(results, key=lambda x: x["score"], reverse=True)[:10]
         print(f"\nТоп-10 адресов по оценке:")
-        for i, result in enumerate(sorted_results, 1):
-            print(f"  {i}. {result['address']} (score: {result['score']})")
-            patterns_str = ", ".join([f"{p['type']}:{p['pattern']}" for p in result["patterns"]])
+        for i, result in enumerate(summary.top(), 1):
+            print(f"  {i}. {result.address} (score: {result.score})")
+            patterns_str = ", ".join([f"{p[0]}:{p[1]}" for p in result.patterns])
             print(f"     Паттерны: {patterns_str}")
 
 
@@ -212,18 +280,62 @@ def main():
                        help='Фильтр по наличию слова в адресе')
     parser.add_argument('--scan-file', '-f',
                        help='Сканировать конкретный файл вместо директории')
+    parser.add_argument('--validate', action='store_true',
+                       help='Пропускать адреса с неверной контрольной суммой Base58Check (требует numpy)')
+    parser.add_argument('--patterns-file',
+                       help='Файл с настройками паттернов (JSON)')
+    parser.add_argument('--include-live', action='store_true',
+                       help='Также сканировать addresses/beautiful_live.json')
+    parser.add_argument('--build-cache', metavar='DIR',
+                       help='Сохранить векторы признаков кандидатов в кэш (требует numpy)')
+    parser.add_argument('--cache-floor', type=float,
+                       help='Минимальная оценка для попадания в кэш (по умолчанию: DEFAULT_FLOOR из feature_cache.py)')
+    parser.add_argument('--segments', metavar='DIR',
+                       help='Сканировать архив сегментов без дубликатов (см. dump_compactor.py) вместо директории')
+    parser.add_argument('--from-cache', metavar='DIR',
+                       help='Пересчитать оценки по кэшу признаков без сканирования дампов')
+    parser.add_argument('--run-size', type=int, default=100000,
+                       help='Количество записей в памяти до сброса на диск при сортировке (по умолчанию: 100000)')
     
     args = parser.parse_args()
     
     # Создаем экземпляры классов
-    matcher = PatternMatcher()
+    try:
+        matcher = PatternMatcher(args.patterns_file)
+    except ValueError as e:
+        parser.error(str(e))
     finder = AddressFinder(matcher)
     
-    # Сканируем файлы
-    if args.scan_file:
-        results = finder.scan_file(args.scan_file, args.min_score)
+    if args.from_cache:
+        # Пересчёт по кэшу: новые множители - одно матричное умножение
+        from feature_cache import FeatureCache
+        cache = FeatureCache.load(args.from_cache)
+        stale = cache.stale_features(matcher)
+        print(f"Кэш признаков: {len(cache)} кандидатов (порог {cache.floor})")
+        if stale:
+            print(f"Пересчитываются признаки: {', '.join(stale)}")
+            print("  Адреса ниже порога кэша не учитываются: если списки расширены или min_length уменьшен,")
+            print("  соберите кэш заново через --build-cache")
+            cache.refresh(matcher)
+            cache.save(args.from_cache)
+        results = cache.iter_results(matcher, args.min_score)
     else:
-        results = finder.scan_directory(args.directory, args.pattern, args.min_score)
+        if args.build_cache:
+            from feature_cache import DEFAULT_FLOOR, FeatureCacheBuilder
+            floor = args.cache_floor if args.cache_floor is not None else DEFAULT_FLOOR
+            finder.feature_builder = FeatureCacheBuilder(matcher, floor)
+        
+        # Сканируем файлы потоково, без накопления результатов в памяти
+        if args.scan_file:
+            results = finder.iter_file(args.scan_file, args.min_score, args.validate)
+        elif args.segments:
+            results = finder.iter_segments(args.segments, args.min_score, args.validate)
+        else:
+            results = finder.iter_directory(args.directory, args.pattern, args.min_score, args.validate)
+        
+        if args.include_live:
+            live_file = os.path.join(BASE_DIR, "addresses", "beautiful_live.json")
+            results = itertools.chain(results, finder.iter_live_file(live_file, args.min_score, args.validate))
     
     # Применяем фильтры
     if args.filter_type:
@@ -234,12 +346,15 @@ def main():
         results = finder.filter_by_word(results, args.filter_word)
         print(f"Применен фильтр по слову: {args.filter_word}")
     
-    # Выводим сводку
-    finder.print_summary(results)
-    
     # Сохраняем результаты
-    if results:
-        finder.save_results(results, args.output)
+    summary = finder.save_results(results, args.output, args.run_size)
+    
+    if finder.feature_builder is not None:
+        finder.feature_builder.build().save(args.build_cache)
+        print(f"Кэш признаков сохранён: {args.build_cache} ({finder.feature_builder.count} кандидатов)")
+    
+    # Выводим сводку
+    finder.print_summary(summary)
 
 
 if __name__ == "__main__":
@@ -1,68 +1,117 @@
 #!/usr/bin/env python3
 import os
 import time
+import signal
 import threading
 import multiprocessing
 import logging
-from tronpy.keys import PrivateKey
 from pattern_matcher import PatternMatcher
+from key_backends import KEY_BACKENDS, KeyBackend, TronpyBackend, get_backend
+from machine_profile import DEFAULT_SETTINGS, load_settings
+from pipeline import DEFAULT_QUEUE_SIZE, Pipeline
 import json
 from datetime import datetime
+from typing import Optional
+
+logger = logging.getLogger(__name__)
 
 # Определяем базовую директорию (на уровень выше, так как этот файл в app/)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
 
-# Настройка логирования для всего скрипта (общий лог)
 LOG_DIR = os.path.join(BASE_DIR, "logs")
-if not os.path.exists(LOG_DIR):
-    os.makedirs(LOG_DIR)
 LOG_FILE = os.path.join(LOG_DIR, "address_generator_v2.log")
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[
-        logging.FileHandler(LOG_FILE),
-        logging.StreamHandler()
-    ]
-)
 
-# Глобальное событие для остановки всех потоков
-stop_event = threading.Event()
-# Lock для синхронизации записи красивых адресов
-beautiful_lock = threading.Lock()
+
+def setup_logging():
+    """
+    Настройка логирования для всего скрипта (общий лог). Вызывается только при
+    запуске из командной строки, чтобы импорт модуля (например, из search_api)
+    не менял логирование приложения, в которое он встроен.
+    """
+    if not os.path.exists(LOG_DIR):
+        os.makedirs(LOG_DIR)
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+        handlers=[
+            logging.FileHandler(LOG_FILE),
+            logging.StreamHandler()
+        ]
+    )
+
+# Глобальное событие для остановки всех потоков и процессов
+stop_event = multiprocessing.Event()
+# Lock для синхронизации записи красивых адресов (общий для процессов)
+beautiful_lock = multiprocessing.Lock()
 # Счетчики
 total_generated = multiprocessing.Value('i', 0)
 beautiful_found = multiprocessing.Value('i', 0)
 
 class AddressGeneratorV2:
-    def __init__(self, pattern_matcher: PatternMatcher, min_score: int = 50):
+    def __init__(self, pattern_matcher: PatternMatcher, min_score: int = 50, persist: bool = True,
+                 key_backend: Optional[KeyBackend] = None):
         self.matcher = pattern_matcher
         self.min_score = min_score
+        # Источник ключей: tronpy или таблица кратных G (см. key_backends.py)
+        self.key_backend = key_backend or TronpyBackend()
+        # Общие объекты синхронизации хранятся в экземпляре, чтобы попасть в дочерние
+        # процессы вместе с ним (при spawn/forkserver глобальные переменные модуля
+        # создаются в каждом процессе заново); встраиваемые сессии подменяют их своими
+        self.stop = stop_event
+        self.counter = total_generated
+        self.lock = beautiful_lock
+        self.found = beautiful_found
         self.beautiful_addresses_file = os.path.join(BASE_DIR, "addresses", "beautiful_live.txt")
         self.beautiful_json_file = os.path.join(BASE_DIR, "addresses", "beautiful_live.json")
         
-        # Создаем директорию addresses если её нет
-        os.makedirs(os.path.join(BASE_DIR, "addresses"), exist_ok=True)
-        
-        # Инициализируем файлы
-        if not os.path.exists(self.beautiful_json_file):
-            with open(self.beautiful_json_file, 'w') as f:
-                json.dump([], f)
+        if persist:
+            # Создаем директорию addresses если её нет
+            os.makedirs(os.path.join(BASE_DIR, "addresses"), exist_ok=True)
+            
+            # Инициализируем файлы
+            if not os.path.exists(self.beautiful_json_file):
+                with open(self.beautiful_json_file, 'w') as f:
+                    json.dump([], f)
+    
+    def evaluate(self, address: str) -> Optional[dict]:
+        """Анализ адреса; подклассы могут пропускать его, если оценка не нужна"""
+        return self.matcher.analyze_address(address)
+    
+    def is_hit(self, address: str, analysis: Optional[dict]) -> bool:
+        """Подходит ли адрес (по умолчанию - красивый по min_score)"""
+        return analysis["score"] >= self.min_score
+    
+    def handle_hit(self, address: str, private_key: str, analysis: Optional[dict]):
+        """Обработка найденного адреса (по умолчанию - сохранение в beautiful_live)"""
+        self.save_beautiful_address(address, private_key, analysis)
     
     def save_beautiful_address(self, address: str, private_key: str, analysis: dict):
         """Сохраняет красивый адрес в отдельный файл"""
-        with beautiful_lock:
+        # Запись и вывод готовятся до захвата блокировки (в режиме --pipeline
+        # этим занимается отдельная стадия, см. pipeline.py)
+        found_at = datetime.now()
+        lines = [
+            f"\n{'='*80}\n",
+            f"Найден: {found_at.strftime('%Y-%m-%d %H:%M:%S')}\n",
+            f"Адрес: {address}\n",
+            f"Приватный ключ: {private_key}\n",
+            f"Оценка: {analysis['score']}\n",
+            "Паттерны:\n"
+        ]
+        for pattern in analysis['patterns_found']:
+            lines.append(f"  - {pattern['type']}: {pattern['pattern']} (score: {pattern['score']})\n")
+        entry = {
+            "found_at": found_at.isoformat(),
+            "address": address,
+            "private_key": private_key,
+            "score": analysis['score'],
+            "patterns": analysis['patterns_found']
+        }
+        
+        with self.lock:
             # Сохраняем в текстовый файл
             with open(self.beautiful_addresses_file, 'a') as f:
-                f.write(f"\n{'='*80}\n")
-                f.write(f"Найден: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write(f"Адрес: {address}\n")
-                f.write(f"Приватный ключ: {private_key}\n")
-                f.write(f"Оценка: {analysis['score']}\n")
-                f.write("Паттерны:\n")
-                for pattern in analysis['patterns_found']:
-                    f.write(f"  - {pattern['type']}: {pattern['pattern']} (score: {pattern['score']})\n")
-                f.flush()
+                f.write("".join(lines))
             
             # Добавляем в JSON файл
             try:
@@ -71,32 +120,32 @@ class AddressGeneratorV2:
             except:
                 beautiful_list = []
             
-            beautiful_list.append({
-                "found_at": datetime.now().isoformat(),
-                "address": address,
-                "private_key": private_key,
-                "score": analysis['score'],
-                "patterns": analysis['patterns_found']
-            })
+            beautiful_list.append(entry)
             
             with open(self.beautiful_json_file, 'w') as f:
                 json.dump(beautiful_list, f, indent=2)
             
-            beautiful_found.value += 1
-            
-            # Выводим в консоль
-            print(f"\n🎉 НАЙДЕН КРАСИВЫЙ АДРЕС! (Score: {analysis['score']})")
-            print(f"   Адрес: {address}")
-            patterns_str = ", ".join([f"{p['type']}:{p['pattern']}" for p in analysis['patterns_found']])
-            print(f"   Паттерны: {patterns_str}")
-            print(f"   Всего найдено красивых: {beautiful_found.value}\n")
-    
-    def worker(self, thread_id: int, save_all: bool = True):
+            self.found.value += 1
+            total = self.found.value
+        
+        # Выводим в консоль
+        print(f"\n🎉 НАЙДЕН КРАСИВЫЙ АДРЕС! (Score: {analysis['score']})")
+        print(f"   Адрес: {address}")
+        patterns_str = ", ".join([f"{p['type']}:{p['pattern']}" for p in analysis['patterns_found']])
+        print(f"   Паттерны: {patterns_str}")
+        print(f"   Всего найдено красивых: {total}\n")
+    
+    def worker(self, thread_id: int, save_all: bool = True,
+               batch_size: int = DEFAULT_SETTINGS["batch_size"],
+               flush_interval: float = DEFAULT_SETTINGS["flush_interval"]):
         """
-        Функция-воркер для потока с проверкой на красивые адреса
+        Функция-воркер для потока с проверкой на красивые адреса.
+        Адреса генерируются пачками по batch_size: общий счетчик и флаг
+        остановки проверяются раз в пачку, файл сбрасывается не чаще
+        flush_interval секунд.
         """
         thread_filename = os.path.join(BASE_DIR, "addresses", f"addresses_thread_{thread_id}.txt")
-        logging.info(f"Поток {thread_id}: запуск (save_all={save_all})")
+        logger.info(f"Поток {thread_id}: запуск (save_all={save_all})")
         
         try:
             # Открываем файл только если save_all=True
@@ -104,50 +153,72 @@ class AddressGeneratorV2:
             
             iteration = 0
             local_beautiful = 0
+            last_flush = time.time()
             
-            while not stop_event.is_set():
-                iteration += 1
-                
-                # Генерируем адрес
-                priv_key = PrivateKey.random()
-                address = priv_key.public_key.to_base58check_address()
-                
-                # Увеличиваем счетчик
-                with total_generated.get_lock():
-                    total_generated.value += 1
-                
-                # Анализируем адрес
-                analysis = self.matcher.analyze_address(address)
+            while not self.stop.is_set():
+                # Генерируем пачку адресов
+                for private_key, address in self.key_backend.generate_addresses(batch_size):
+                    iteration += 1
+                    
+                    # Анализируем адрес
+                    analysis = self.evaluate(address)
+                    
+                    # Если адрес красивый
+                    if self.is_hit(address, analysis):
+                        local_beautiful += 1
+                        self.handle_hit(address, private_key, analysis)
+                    
+                    # Сохраняем все адреса если save_all=True
+                    if save_all and file_handle:
+                        line = f"Address: {address}, PrivateKey: {private_key}, Score: {analysis['score']}\n"
+                        file_handle.write(line)
+                    
+                    # Показываем прогресс каждые 10000 итераций
+                    if iteration % 10000 == 0:
+                        logger.info(f"Поток {thread_id}: {iteration} адресов, {local_beautiful} красивых найдено")
+                    
+                    # Небольшая задержка для снижения нагрузки
+                    if iteration % 100 == 0:
+                        time.sleep(0.001)
                 
-                # Если адрес красивый
-                if analysis["score"] >= self.min_score:
-                    local_beautiful += 1
-                    self.save_beautiful_address(address, priv_key.hex(), analysis)
+                # Увеличиваем счетчик один раз на пачку
+                with self.counter.get_lock():
+                    self.counter.value += batch_size
                 
-                # Сохраняем все адреса если save_all=True
-                if save_all and file_handle:
-                    line = f"Address: {address}, PrivateKey: {priv_key.hex()}, Score: {analysis['score']}\n"
-                    file_handle.write(line)
+                # Сбрасываем файл не чаще flush_interval
+                if file_handle and time.time() - last_flush >= flush_interval:
                     file_handle.flush()
-                
-                # Показываем прогресс каждые 10000 итераций
-                if iteration % 10000 == 0:
-                    logging.info(f"Поток {thread_id}: {iteration} адресов, {local_beautiful} красивых найдено")
-                
-                # Небольшая задержка для снижения нагрузки
-                if iteration % 100 == 0:
-                    time.sleep(0.001)
+                    last_flush = time.time()
                     
         except Exception as e:
-            logging.exception(f"Поток {thread_id}: ошибка при генерации адресов")
+            logger.exception(f"Поток {thread_id}: ошибка при генерации адресов")
         finally:
             if file_handle:
                 file_handle.close()
         
-        logging.info(f"Поток {thread_id} завершён. Найдено красивых: {local_beautiful}")
+        logger.info(f"Поток {thread_id} завершён. Найдено красивых: {local_beautiful}")
 
 
-def print_statistics():
+def run_worker_process(generator: AddressGeneratorV2, thread_ids: list, save_all: bool,
+                       batch_size: int, flush_interval: float):
+    """Процесс с несколькими потоками-воркерами; остановка через generator.stop"""
+    # Ctrl+C обрабатывает главный процесс
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # При spawn/forkserver настройки логирования из main() не наследуются
+    setup_logging()
+    threads = []
+    for thread_id in thread_ids:
+        t = threading.Thread(
+            target=generator.worker,
+            args=(thread_id, save_all, batch_size, flush_interval)
+        )
+        t.start()
+        threads.append(t)
+    for t in threads:
+        t.join()
+
+
+def print_statistics(pipeline: Optional[Pipeline] = None):
     """Выводит статистику генерации каждые 5 секунд"""
     start_time = time.time()
     last_total = 0
@@ -170,6 +241,8 @@ def print_statistics():
         print(f"   Скорость: {addresses_per_second:.0f} адр/сек (средняя: {total_speed:.0f} адр/сек)")
         if current_beautiful > 0:
             print(f"   Частота красивых: 1 из {current_total // current_beautiful:,}")
+        if pipeline:
+            pipeline.print_stats()
         
         last_total = current_total
 
@@ -177,50 +250,112 @@ def print_statistics():
 def main():
     import argparse
     
+    def positive_int(value: str) -> int:
+        number = int(value)
+        if number < 1:
+            raise argparse.ArgumentTypeError(f"должно быть не меньше 1: {value}")
+        return number
+    
     parser = argparse.ArgumentParser(description='Генератор красивых TRON адресов v2')
-    parser.add_argument('--threads', '-t', type=int, default=10,
-                       help='Количество потоков (по умолчанию: 10)')
+    parser.add_argument('--threads', '-t', type=int,
+                       help='Количество потоков в каждом процессе (по умолчанию: 10, с профилем машины: 1)')
+    parser.add_argument('--processes', '-P', type=positive_int,
+                       help='Количество процессов (по умолчанию: из профиля машины или 1)')
+    parser.add_argument('--batch-size', type=int,
+                       help='Размер пачки адресов между обновлениями счетчиков (по умолчанию: из профиля)')
+    parser.add_argument('--flush-interval', type=float,
+                       help='Интервал сброса файлов в секундах (по умолчанию: из профиля)')
+    parser.add_argument('--key-backend', choices=sorted(KEY_BACKENDS),
+                       help='Источник ключей: tronpy или table (по умолчанию: из профиля или tronpy)')
     parser.add_argument('--min-score', '-s', type=int, default=50,
                        help='Минимальная оценка для красивого адреса (по умолчанию: 50)')
     parser.add_argument('--no-save-all', action='store_true',
                        help='Не сохранять все адреса, только красивые')
     parser.add_argument('--patterns-file', '-p',
                        help='Файл с настройками паттернов (JSON)')
+    parser.add_argument('--pipeline', action='store_true',
+                       help='Конвейер процессов generate -> encode -> score -> persist (см. pipeline.py); '
+                            '--processes задаёт число процессов генерации')
+    parser.add_argument('--encode-workers', type=positive_int, default=1,
+                       help='Процессов кодирования Base58 в режиме --pipeline (по умолчанию: 1)')
+    parser.add_argument('--score-workers', type=positive_int, default=1,
+                       help='Процессов оценки адресов в режиме --pipeline (по умолчанию: 1)')
+    parser.add_argument('--persist-workers', type=positive_int, default=1,
+                       help='Процессов записи всех адресов в режиме --pipeline (по умолчанию: 1)')
+    parser.add_argument('--queue-size', type=positive_int, default=DEFAULT_QUEUE_SIZE,
+                       help=f'Размер очередей между стадиями в пачках (по умолчанию: {DEFAULT_QUEUE_SIZE})')
     
     args = parser.parse_args()
+    setup_logging()
     
-    # Создаем matcher
-    matcher = PatternMatcher(args.patterns_file)
-    generator = AddressGeneratorV2(matcher, args.min_score)
+    # Настройки из профиля машины (см. calibrate.py); явные аргументы важнее
+    profile_settings = load_settings(revalidate=True)
+    settings = dict(DEFAULT_SETTINGS, **(profile_settings or {}))
+    processes = args.processes or settings["processes"]
+    threads_per_process = args.threads or (1 if profile_settings else 10)
+    batch_size = args.batch_size or settings["batch_size"]
+    flush_interval = args.flush_interval if args.flush_interval is not None else settings["flush_interval"]
+    save_all = not args.no_save_all
+    key_backend = args.key_backend or settings["key_backend"]
     
-    logging.info(f"Запуск генератора TRON адресов v2")
-    logging.info(f"Потоков: {args.threads}")
-    logging.info(f"Минимальная оценка: {args.min_score}")
-    logging.info(f"Сохранять все адреса: {not args.no_save_all}")
+    logger.info(f"Запуск генератора TRON адресов v2")
+    logger.info(f"Профиль машины: {'загружен' if profile_settings else 'нет'}")
+    logger.info(f"Процессов: {processes}, потоков в процессе: {threads_per_process}")
+    logger.info(f"Размер пачки: {batch_size}, интервал сброса: {flush_interval}с")
+    logger.info(f"Источник ключей: {key_backend}")
+    if args.pipeline:
+        logger.info(f"Конвейер: кодирование {args.encode_workers}, оценка {args.score_workers}, "
+                    f"запись {args.persist_workers}, очередь {args.queue_size} пачек")
+    logger.info(f"Минимальная оценка: {args.min_score}")
+    logger.info(f"Сохранять все адреса: {not args.no_save_all}")
     
     print(f"\n🚀 ГЕНЕРАТОР КРАСИВЫХ TRON АДРЕСОВ V2")
     print(f"{'='*50}")
-    print(f"Потоков: {args.threads}")
+    print(f"Процессов: {processes}, потоков в процессе: {threads_per_process}")
     print(f"Минимальная оценка для красивого адреса: {args.min_score}")
     print(f"Сохранение всех адресов: {'Да' if not args.no_save_all else 'Нет'}")
     print(f"Красивые адреса сохраняются в: addresses/beautiful_live.txt")
     print(f"{'='*50}")
     print(f"Нажмите Ctrl+C для остановки\n")
     
+    # В режиме конвейера стадии запускаются отдельными процессами
+    pipeline = None
+    if args.pipeline:
+        pipeline = Pipeline(
+            args.patterns_file, args.min_score, save_all, key_backend, batch_size, flush_interval,
+            generate_workers=processes, encode_workers=args.encode_workers,
+            score_workers=args.score_workers, persist_workers=args.persist_workers,
+            queue_size=args.queue_size, stop=stop_event, generated=total_generated, found=beautiful_found
+        )
+    else:
+        # Создаем matcher и генератор (в режиме конвейера стадии создают их сами)
+        matcher = PatternMatcher(args.patterns_file)
+        generator = AddressGeneratorV2(matcher, args.min_score, key_backend=get_backend(key_backend))
+    
     # Запускаем поток статистики
-    stats_thread = threading.Thread(target=print_statistics, daemon=True)
+    stats_thread = threading.Thread(target=print_statistics, args=(pipeline,), daemon=True)
     stats_thread.start()
     
-    # Запускаем рабочие потоки
-    threads = []
+    # Запускаем рабочие потоки (в одном процессе) или процессы с потоками
+    workers = []
     try:
-        for i in range(1, args.threads + 1):
-            t = threading.Thread(
-                target=generator.worker, 
-                args=(i, not args.no_save_all)
-            )
-            t.start()
-            threads.append(t)
+        for p in range(0 if pipeline else processes):
+            thread_ids = list(range(p * threads_per_process + 1, (p + 1) * threads_per_process + 1))
+            if processes == 1:
+                for thread_id in thread_ids:
+                    w = threading.Thread(
+                        target=generator.worker, 
+                        args=(thread_id, save_all, batch_size, flush_interval)
+                    )
+                    w.start()
+                    workers.append(w)
+            else:
+                w = multiprocessing.Process(
+                    target=run_worker_process,
+                    args=(generator, thread_ids, save_all, batch_size, flush_interval)
+                )
+                w.start()
+                workers.append(w)
         
         # Ожидаем нажатия Ctrl+C
         while True:
@@ -230,9 +365,16 @@ def main():
         print("\n\n⏸️  Остановка генератора...")
         stop_event.set()
     
-    # Ожидаем завершения всех потоков
-    for t in threads:
-        t.join()
+    # Ожидаем завершения всех потоков и процессов
+    for w in workers:
+        w.join()
+    if pipeline:
+        print("   Дообработка очередей конвейера (повторный Ctrl+C - прервать без ожидания)...")
+        try:
+            pipeline.close()
+        except KeyboardInterrupt:
+            print("   Конвейер остановлен без дообработки очередей")
+        pipeline.print_stats()
     
     print(f"\n✅ Генерация завершена")
     print(f"   Всего сгенерировано: {total_generated.value:,}")
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+import hashlib
+from typing import List, Optional, Sequence, Tuple, Union
+import numpy as np
+
+ALPHABET = b"123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+ALPHABET_ARRAY = np.frombuffer(ALPHABET, dtype=np.uint8)
+
+# Обратная таблица: байт символа -> цифра base58 (-1 для недопустимых символов)
+DECODE_TABLE = np.full(256, -1, dtype=np.int16)
+DECODE_TABLE[ALPHABET_ARRAY] = np.arange(58, dtype=np.int16)
+
+TRON_PREFIX = 0x41
+PAYLOAD_SIZE = 21
+ADDRESS_LENGTH = 34
+
+# 25 байт (payload + checksum) в 7 лимбах по 32 бита (старшие 3 байта нулевые)
+LIMB_COUNT = 7
+LIMB_MASK = np.uint64(0xFFFFFFFF)
+LIMB_SHIFT = np.uint64(32)
+# Делим сразу на 58^5 < 2^32, чтобы остаток помещался в uint64 вместе с лимбом
+CHUNK_DIGITS = 5
+CHUNK_BASE = 58 ** CHUNK_DIGITS
+
+
+def checksums(data: np.ndarray) -> np.ndarray:
+    """SHA-256d контрольные суммы (первые 4 байта) для каждой строки массива N×K"""
+    count, width = data.shape
+    raw = memoryview(np.ascontiguousarray(data).tobytes())
+    out = bytearray(count * 4)
+    sha256 = hashlib.sha256
+    for i in range(count):
+        out[i * 4:i * 4 + 4] = sha256(sha256(raw[i * width:(i + 1) * width]).digest()).digest()[:4]
+    return np.frombuffer(bytes(out), dtype=np.uint8).reshape(count, 4)
+
+
+def _bytes_to_limbs(data: np.ndarray) -> np.ndarray:
+    """N×25 байт (big-endian) -> N×7 лимбов uint64 по 32 бита"""
+    padded = np.zeros((data.shape[0], LIMB_COUNT * 4), dtype=np.uint8)
+    padded[:, LIMB_COUNT * 4 - data.shape[1]:] = data
+    return padded.view('>u4').astype(np.uint64)
+
+
+def _limbs_to_bytes(limbs: np.ndarray) -> np.ndarray:
+    """N×7 лимбов -> N×28 байт (big-endian)"""
+    return limbs.astype('>u4').view(np.uint8).reshape(limbs.shape[0], LIMB_COUNT * 4)
+
+
+def encode_batch(payloads: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Кодирует N×21 payload (0x41 + 20 байт адреса) в N адресов Base58Check.
+
+    Результат - массив N×34 uint8 с ASCII-символами адресов; out можно
+    передать заранее выделенным, чтобы не создавать буфер на каждую пачку.
+    out.view('S34') даёт адреса как байтовые строки фиксированной длины.
+    Для префикса 0x41 адрес всегда занимает ровно 34 символа.
+    """
+    payloads = np.asarray(payloads, dtype=np.uint8)
+    if payloads.ndim != 2 or payloads.shape[1] != PAYLOAD_SIZE:
+        raise ValueError(f"Ожидается массив N×{PAYLOAD_SIZE}, получен {payloads.shape}")
+    if not np.all(payloads[:, 0] == TRON_PREFIX):
+        raise ValueError("Все payload должны начинаться с префикса TRON 0x41")
+
+    count = payloads.shape[0]
+    if out is None:
+        out = np.empty((count, ADDRESS_LENGTH), dtype=np.uint8)
+    elif out.shape != (count, ADDRESS_LENGTH) or out.dtype != np.uint8:
+        raise ValueError(f"Буфер out должен быть uint8 размером {count}×{ADDRESS_LENGTH}")
+
+    limbs = _bytes_to_limbs(np.concatenate([payloads, checksums(payloads)], axis=1))
+    digits = np.empty((count, ADDRESS_LENGTH), dtype=np.uint8)
+    divisor = np.uint64(CHUNK_BASE)
+    base = np.uint64(58)
+
+    # Длинное деление всех чисел пачки сразу: каждый проход отщепляет 5 цифр
+    position = ADDRESS_LENGTH
+    while position > 0:
+        remainder = np.zeros(count, dtype=np.uint64)
+        for j in range(LIMB_COUNT):
+            current = (remainder << LIMB_SHIFT) | limbs[:, j]
+            limbs[:, j] = current // divisor
+            remainder = current % divisor
+        for _ in range(CHUNK_DIGITS):
+            if position == 0:
+                break
+            position -= 1
+            digits[:, position] = remainder % base
+            remainder //= base
+
+    np.take(ALPHABET_ARRAY, digits, out=out)
+    return out
+
+
+def _to_char_array(addresses: Union[np.ndarray, Sequence[str]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Приводит адреса к массиву N×34 uint8; возвращает также маску корректной длины"""
+    if isinstance(addresses, np.ndarray):
+        if addresses.dtype == np.uint8 and addresses.ndim == 2 and addresses.shape[1] == ADDRESS_LENGTH:
+            return addresses, np.ones(addresses.shape[0], dtype=bool)
+        addresses = [a.decode('ascii', 'replace') if isinstance(a, bytes) else str(a) for a in addresses]
+
+    length_ok = np.array([len(a) == ADDRESS_LENGTH for a in addresses], dtype=bool)
+    placeholder = "1" * ADDRESS_LENGTH
+    joined = "".join(a if ok else placeholder for a, ok in zip(addresses, length_ok))
+    chars = np.frombuffer(joined.encode('ascii', 'replace'), dtype=np.uint8)
+    return chars.reshape(len(addresses), ADDRESS_LENGTH), length_ok
+
+
+def decode_batch(addresses: Union[np.ndarray, Sequence[str]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Декодирует пачку адресов TRON Base58Check.
+
+    Принимает список строк или массив N×34 uint8. Возвращает payload N×21
+    и маску valid: длина 34, допустимые символы, префикс 0x41 и верная
+    контрольная сумма. Для невалидных адресов payload не определён.
+    """
+    chars, valid = _to_char_array(addresses)
+    count = chars.shape[0]
+    digits = DECODE_TABLE[chars]
+    valid &= np.all(digits >= 0, axis=1)
+    digits = np.where(digits >= 0, digits, 0).astype(np.uint64)
+
+    # Горнер по кускам из 5 цифр: value = value * 58^k + chunk
+    limbs = np.zeros((count, LIMB_COUNT), dtype=np.uint64)
+    start = 0
+    first = ADDRESS_LENGTH % CHUNK_DIGITS or CHUNK_DIGITS
+    for end in range(first, ADDRESS_LENGTH + 1, CHUNK_DIGITS):
+        chunk = np.zeros(count, dtype=np.uint64)
+        for i in range(start, end):
+            chunk = chunk * np.uint64(58) + digits[:, i]
+        carry = chunk
+        multiplier = np.uint64(58 ** (end - start))
+        for j in range(LIMB_COUNT - 1, -1, -1):
+            current = limbs[:, j] * multiplier + carry
+            limbs[:, j] = current & LIMB_MASK
+            carry = current >> LIMB_SHIFT
+        start = end
+
+    raw = _limbs_to_bytes(limbs)
+    # Число должно помещаться в 25 байт
+    valid &= np.all(raw[:, :LIMB_COUNT * 4 - 25] == 0, axis=1)
+    data = raw[:, LIMB_COUNT * 4 - 25:]
+    payloads = np.ascontiguousarray(data[:, :PAYLOAD_SIZE])
+    valid &= payloads[:, 0] == TRON_PREFIX
+    valid &= np.all(checksums(payloads) == data[:, PAYLOAD_SIZE:], axis=1)
+    return payloads, valid
+
+
+def to_strings(encoded: np.ndarray) -> List[str]:
+    """Массив N×34 uint8 -> список строк адресов"""
+    return [a.decode('ascii') for a in encoded.view(f'S{ADDRESS_LENGTH}').ravel()]
+
+
+def is_valid_address(address: str) -> bool:
+    """Проверка одного адреса (для единичных вызовов; пачками - decode_batch)"""
+    return bool(decode_batch([address])[1][0])
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+import os
+import sys
+import time
+import signal
+import shutil
+import argparse
+import logging
+import tempfile
+import multiprocessing
+from typing import Dict, List, Optional
+from pattern_matcher import PatternMatcher
+from machine_profile import DEFAULT_SETTINGS, PROFILE_FILE, read_profile, save_profile
+from key_backends import KEY_BACKENDS, get_backend
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s"
+)
+
+# Если скорость отличается меньше чем на столько, выбираем вариант с меньшей задержкой
+RATE_TOLERANCE = 0.03
+
+
+def bench_worker(worker_id: int, key_backend: str, batch_size: int, flush_interval: float, min_score: int,
+                 out_dir: str, stop_event, ready, counter, first_hit, start_time):
+    """
+    Воркер замера: повторяет рабочий цикл address_generator_v2 (генерация,
+    оценка, запись всех адресов) с заданными размером пачки и интервалом сброса.
+    Время до первого красивого адреса отсчитывается от start_time, который
+    выставляется, когда готовы все воркеры (без запуска процессов и импортов).
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    backend = get_backend(key_backend)
+    matcher = PatternMatcher()
+    with ready.get_lock():
+        ready.value += 1
+
+    last_flush = time.time()
+    with open(os.path.join(out_dir, f"bench_{worker_id}.txt"), 'a') as f:
+        while not stop_event.is_set():
+            for private_key, address in backend.generate_addresses(batch_size):
+                score = matcher.analyze_address(address)["score"]
+                f.write(f"Address: {address}, PrivateKey: {private_key}, Score: {score}\n")
+                if score >= min_score and first_hit.value == 0 and start_time.value:
+                    with first_hit.get_lock():
+                        if first_hit.value == 0:
+                            first_hit.value = time.time() - start_time.value
+
+            with counter.get_lock():
+                counter.value += batch_size
+
+            now = time.time()
+            if now - last_flush >= flush_interval:
+                f.flush()
+                last_flush = now
+
+
+def run_trial(key_backend: str, processes: int, batch_size: int, flush_interval: float,
+              duration: float, warmup: float, min_score: int) -> Dict:
+    """Один замер: скорость в установившемся режиме и время до первого красивого адреса"""
+    out_dir = tempfile.mkdtemp(prefix="calibrate_")
+    stop_event = multiprocessing.Event()
+    ready = multiprocessing.Value('i', 0)
+    counter = multiprocessing.Value('Q', 0)
+    first_hit = multiprocessing.Value('d', 0.0)
+    start_time = multiprocessing.Value('d', 0.0)
+    workers = [
+        multiprocessing.Process(
+            target=bench_worker,
+            args=(i, key_backend, batch_size, flush_interval, min_score, out_dir, stop_event, ready,
+                  counter, first_hit, start_time)
+        )
+        for i in range(processes)
+    ]
+    try:
+        for p in workers:
+            p.start()
+        # Ждём инициализации воркеров (импорт, загрузка таблиц), затем прогрев
+        while ready.value < processes and all(p.is_alive() for p in workers):
+            time.sleep(0.05)
+        start_time.value = time.time()
+        time.sleep(warmup)
+        begin_count, begin_time = counter.value, time.time()
+        time.sleep(duration)
+        end_count, end_time = counter.value, time.time()
+    finally:
+        stop_event.set()
+        for p in workers:
+            p.join()
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+    rate = (end_count - begin_count) / (end_time - begin_time)
+    result = {
+        "key_backend": key_backend,
+        "processes": processes,
+        "batch_size": batch_size,
+        "flush_interval": flush_interval,
+        "rate": round(rate, 1),
+        "first_hit_latency": round(first_hit.value, 3) if first_hit.value else None
+    }
+    latency = f"{result['first_hit_latency']}с" if result["first_hit_latency"] else "нет"
+    print(f"  ключи={key_backend:<6} процессов={processes:<3} пачка={batch_size:<5} сброс={flush_interval:<4} -> "
+          f"{rate:,.0f} адр/сек, первый красивый: {latency}")
+    return result
+
+
+def best_trial(trials: List[Dict]) -> Dict:
+    """Лучший замер по скорости; при близкой скорости - по времени до первого попадания"""
+    top_rate = max(t["rate"] for t in trials)
+    close = [t for t in trials if t["rate"] >= top_rate * (1 - RATE_TOLERANCE)]
+    return min(close, key=lambda t: (t["first_hit_latency"] is None,
+                                     t["first_hit_latency"] or 0, -t["rate"]))
+
+
+def sweep(backend_options: List[str], process_options: List[int], batch_options: List[int],
+          flush_options: List[float], duration: float, warmup: float, min_score: int,
+          start: Optional[Dict] = None):
+    """
+    Покоординатный перебор: источник ключей, число процессов, размер пачки,
+    интервал сброса - каждый при лучших найденных остальных параметрах.
+    """
+    settings = dict(start or DEFAULT_SETTINGS)
+    measurements = []
+    for name, options in (("key_backend", backend_options),
+                          ("processes", process_options),
+                          ("batch_size", batch_options),
+                          ("flush_interval", flush_options)):
+        if len(options) == 1:
+            # Выбирать не из чего - замер ничего не даст
+            settings[name] = options[0]
+            continue
+        print(f"\nПодбор параметра {name}: {options}")
+        trials = []
+        for value in options:
+            trial_settings = dict(settings, **{name: value})
+            trials.append(run_trial(trial_settings["key_backend"], trial_settings["processes"],
+                                    trial_settings["batch_size"],
+                                    trial_settings["flush_interval"], duration, warmup, min_score))
+        measurements.extend(trials)
+        best = best_trial(trials)
+        settings[name] = best[name]
+    return settings, measurements
+
+
+def calibrate(duration: float = 5.0, warmup: float = 2.0, min_score: int = 50,
+              profile_file: str = PROFILE_FILE, key_backends: Optional[List[str]] = None) -> Dict:
+    """
+    Полная калибровка с сохранением профиля машины. Источник ключей по
+    умолчанию не перебирается: table на Python медленнее tronpy (coincurve)
+    и сравнивается только по явному запросу.
+    """
+    cpu_count = os.cpu_count() or 1
+    process_options = sorted({1, max(1, cpu_count // 2), cpu_count, cpu_count * 2})
+    backend_options = key_backends or [DEFAULT_SETTINGS["key_backend"]]
+    settings, measurements = sweep(backend_options, process_options, [64, 256, 1024, 4096],
+                                   [0.0, 0.5, 1.0, 2.0], duration, warmup, min_score)
+    save_profile(settings, measurements, profile_file)
+    return settings
+
+
+def revalidate_profile(profile: Dict, profile_file: str = PROFILE_FILE,
+                       duration: float = 3.0, warmup: float = 1.5, min_score: int = 50) -> Dict:
+    """
+    Быстрая перепроверка профиля после смены железа: сохранённое число
+    процессов масштабируется на новое число ядер и сравнивается с соседними
+    вариантами, пачка и интервал сброса берутся из старого профиля. Если
+    сравнивать не с чем, выполняется один замер с перенесёнными настройками.
+    """
+    old = dict(DEFAULT_SETTINGS, **profile.get("settings", {}))
+    old_cpus = profile.get("fingerprint", {}).get("cpu_count") or 1
+    cpu_count = os.cpu_count() or 1
+    scaled = max(1, round(old["processes"] * cpu_count / old_cpus))
+    print(f"\n🔧 Перепроверка профиля машины (процессов: {old['processes']} -> {scaled})")
+    settings, measurements = sweep([old["key_backend"]], sorted({scaled, cpu_count}), [old["batch_size"]],
+                                   [old["flush_interval"]], duration, warmup, min_score, start=old)
+    if not measurements:
+        measurements = [run_trial(settings["key_backend"], settings["processes"], settings["batch_size"],
+                                  settings["flush_interval"], duration, warmup, min_score)]
+    previous = [t["rate"] for t in profile.get("measurements", [])
+                if all(t.get(k) == settings[k] for k in ("key_backend", "processes", "batch_size", "flush_interval"))]
+    if previous:
+        print(f"  Скорость по старому профилю: {max(previous):,.0f} адр/сек, "
+              f"сейчас: {max(t['rate'] for t in measurements):,.0f} адр/сек")
+    save_profile(settings, measurements, profile_file)
+    return settings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Калибровка генератора под текущую машину')
+    parser.add_argument('--duration', type=float, default=5.0,
+                       help='Длительность одного замера в секундах (по умолчанию: 5)')
+    parser.add_argument('--warmup', type=float, default=2.0,
+                       help='Прогрев перед замером в секундах (по умолчанию: 2)')
+    parser.add_argument('--min-score', '-s', type=int, default=50,
+                       help='Оценка красивого адреса для замера задержки (по умолчанию: 50)')
+    parser.add_argument('--profile', default=PROFILE_FILE,
+                       help='Файл профиля машины')
+    parser.add_argument('--revalidate', action='store_true',
+                       help='Только быстро перепроверить существующий профиль после смены железа')
+    parser.add_argument('--key-backends', nargs='+', choices=sorted(KEY_BACKENDS),
+                       help=f'Сравнить источники ключей (по умолчанию: только {DEFAULT_SETTINGS["key_backend"]})')
+
+    args = parser.parse_args()
+
+    print("\n⚙️  КАЛИБРОВКА ГЕНЕРАТОРА")
+    print(f"{'='*50}")
+    print(f"Ядер: {os.cpu_count()}, замер: {args.duration}с, прогрев: {args.warmup}с")
+
+    try:
+        profile = read_profile(args.profile) if args.revalidate else None
+        if args.revalidate and profile is None:
+            print(f"Профиль {args.profile} не найден, выполняется полная калибровка")
+        if profile:
+            settings = revalidate_profile(profile, args.profile)
+        else:
+            settings = calibrate(args.duration, args.warmup, args.min_score, args.profile, args.key_backends)
+    except KeyboardInterrupt:
+        print("\nКалибровка прервана, профиль не сохранён")
+        sys.exit(1)
+
+    print(f"\n✅ Профиль сохранён: {args.profile}")
+    print(f"   Источник ключей: {settings['key_backend']}")
+    print(f"   Процессов: {settings['processes']}")
+    print(f"   Размер пачки: {settings['batch_size']}")
+    print(f"   Интервал сброса: {settings['flush_interval']}с")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Сжатие архива дампов в отсортированные сегменты без дубликатов.
+
+Все строки "Address: ..., PrivateKey: ..." из дампов (addresses/, old/,
+old_1/) раскладываются по сегментам по хешу адреса, сортируются внешней
+сортировкой (см. external_sort.py) и записываются без повторов. Записи
+сегмента фиксированной ширины, поэтому к каждому сегменту прилагается
+небольшой разреженный индекс - каждый INDEX_INTERVAL-й адрес - и поиск
+ключа по адресу читает один блок файла вместо полного сканирования.
+
+    python3 app/dump_compactor.py build
+    python3 app/dump_compactor.py lookup TXYZ...
+    python3 app/address_finder.py --segments segments
+"""
+import os
+import sys
+import json
+import zlib
+import heapq
+import shutil
+import string
+import argparse
+import itertools
+from bisect import bisect_right
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+from external_sort import ExternalSorter
+from address_finder import AddressFinder
+from pattern_matcher import PatternMatcher
+from key_backends import BASE58_ALPHABET
+
+# Определяем базовую директорию (на уровень выше, так как этот файл в app/)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+SEGMENTS_DIR = os.path.join(BASE_DIR, "segments")
+MANIFEST_FILE = "manifest.json"
+
+ADDRESS_LENGTH = 34
+KEY_LENGTH = 64
+# Запись сегмента: адрес, пробел, приватный ключ, перевод строки
+RECORD_SIZE = ADDRESS_LENGTH + 1 + KEY_LENGTH + 1
+# Каждый INDEX_INTERVAL-й адрес сегмента попадает в разреженный индекс
+INDEX_INTERVAL = 1024
+DEFAULT_SHARDS = 16
+HEX_DIGITS = set(string.hexdigits)
+BASE58_DIGITS = set(BASE58_ALPHABET)
+
+
+def shard_of(address: str, num_shards: int) -> int:
+    """Номер сегмента адреса"""
+    return zlib.crc32(address.encode('ascii')) % num_shards
+
+
+def segment_path(directory: str, shard: int) -> str:
+    return os.path.join(directory, f"shard_{shard:03d}.seg")
+
+
+def index_path(directory: str, shard: int) -> str:
+    return os.path.join(directory, f"shard_{shard:03d}.idx")
+
+
+def is_valid_record(address: str, private_key: str) -> bool:
+    """Подходит ли пара для записи фиксированной ширины"""
+    return (len(address) == ADDRESS_LENGTH and address.startswith("T") and set(address) <= BASE58_DIGITS
+            and len(private_key) == KEY_LENGTH and set(private_key) <= HEX_DIGITS)
+
+
+class SegmentStore:
+    """Чтение сжатого архива: поиск ключа по адресу и обход всех записей"""
+
+    def __init__(self, directory: str = SEGMENTS_DIR):
+        with open(os.path.join(directory, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("record_size") != RECORD_SIZE:
+            raise ValueError(f"Сегменты {directory} записаны в другом формате, соберите их заново")
+        self.directory = directory
+        self.num_shards = self.manifest["shards"]
+        self.index_interval = self.manifest["index_interval"]
+        self._indexes: Dict[int, List[bytes]] = {}
+
+    @property
+    def count(self) -> int:
+        return sum(self.manifest["counts"])
+
+    @property
+    def sources(self) -> Dict[str, Dict]:
+        """Файлы дампов, уже вошедшие в архив: путь -> размер и время изменения"""
+        return self.manifest.get("sources", {})
+
+    def _index(self, shard: int) -> List[bytes]:
+        index = self._indexes.get(shard)
+        if index is None:
+            with open(index_path(self.directory, shard), 'rb') as f:
+                data = f.read()
+            index = [data[i:i + ADDRESS_LENGTH] for i in range(0, len(data), ADDRESS_LENGTH)]
+            self._indexes[shard] = index
+        return index
+
+    def lookup(self, address: str) -> Optional[str]:
+        """Приватный ключ для адреса или None, если адреса нет в архиве"""
+        if len(address) != ADDRESS_LENGTH or not set(address) <= BASE58_DIGITS:
+            return None
+        shard = shard_of(address, self.num_shards)
+        key = address.encode('ascii')
+        # Блок записей, в котором может находиться адрес
+        block = bisect_right(self._index(shard), key) - 1
+        if block < 0:
+            return None
+        with open(segment_path(self.directory, shard), 'rb') as f:
+            f.seek(block * self.index_interval * RECORD_SIZE)
+            data = f.read(self.index_interval * RECORD_SIZE)
+
+        lo, hi = 0, len(data) // RECORD_SIZE
+        while lo < hi:
+            mid = (lo + hi) // 2
+            found = data[mid * RECORD_SIZE:mid * RECORD_SIZE + ADDRESS_LENGTH]
+            if found < key:
+                lo = mid + 1
+            elif found > key:
+                hi = mid
+            else:
+                start = mid * RECORD_SIZE + ADDRESS_LENGTH + 1
+                return data[start:start + KEY_LENGTH].decode('ascii')
+        return None
+
+    def __contains__(self, address: str) -> bool:
+        return self.lookup(address) is not None
+
+    def iter_shard(self, shard: int) -> Iterator[Tuple[str, str]]:
+        """Пары (адрес, приватный ключ) сегмента в порядке возрастания адреса"""
+        with open(segment_path(self.directory, shard), 'r', encoding='ascii') as f:
+            for line in f:
+                yield line[:ADDRESS_LENGTH], line[ADDRESS_LENGTH + 1:ADDRESS_LENGTH + 1 + KEY_LENGTH]
+
+    def iter_records(self) -> Iterator[Tuple[int, str, str]]:
+        """Все записи архива: (номер сегмента, адрес, приватный ключ)"""
+        for shard in range(self.num_shards):
+            for address, private_key in self.iter_shard(shard):
+                yield shard, address, private_key
+
+
+class CompactStats:
+    """Счетчики сжатия"""
+
+    def __init__(self):
+        self.files = 0
+        self.skipped_files = 0
+        self.lines = 0
+        self.malformed = 0
+        self.invalid = 0
+        self.existing = 0
+        self.duplicates = 0
+        self.conflicts = 0
+        self.written = 0
+
+
+def _iter_dump_pairs(filename: str, stats: CompactStats) -> Iterator[Tuple[str, str]]:
+    with open(filename, 'r', errors='replace') as f:
+        for line in f:
+            stats.lines += 1
+            line = line.strip()
+            if not line:
+                continue
+            parsed = AddressFinder.parse_line(line)
+            if parsed is None or not is_valid_record(*parsed):
+                stats.malformed += 1
+                continue
+            yield parsed
+
+
+def _checked_pairs(pairs: Iterator[Tuple[str, str]], stats: CompactStats,
+                   chunk_size: int = 4096) -> Iterator[Tuple[str, str]]:
+    """Отбрасывает адреса с неверной контрольной суммой Base58Check (пачками, numpy)"""
+    from base58_batch import decode_batch
+    while True:
+        chunk = list(itertools.islice(pairs, chunk_size))
+        if not chunk:
+            return
+        _, valid = decode_batch([address for address, _ in chunk])
+        stats.invalid += len(chunk) - int(valid.sum())
+        yield from (pair for pair, ok in zip(chunk, valid) if ok)
+
+
+def compact(files: List[str], directory: str = SEGMENTS_DIR, num_shards: int = DEFAULT_SHARDS,
+            run_size: int = 100000, validate: bool = False, force: bool = False) -> CompactStats:
+    """
+    Добавляет дампы в архив сегментов. Существующий архив сливается с новыми
+    записями; файлы, которые уже вошли в архив и с тех пор не менялись,
+    пропускаются (force=True - читать все заново). Сегменты записываются
+    во временную директорию и заменяют старые только после успешной сборки.
+    """
+    stats = CompactStats()
+    store = None
+    if os.path.exists(os.path.join(directory, MANIFEST_FILE)):
+        store = SegmentStore(directory)
+        if store.num_shards != num_shards:
+            print(f"Архив разбит на {store.num_shards} сегментов, используется это число")
+            num_shards = store.num_shards
+    sources = dict(store.sources) if store else {}
+
+    tmp_dir = f"{directory.rstrip(os.sep)}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    try:
+        with ExternalSorter(run_size, tmp_dir) as sorter:
+            for filename in files:
+                path = os.path.abspath(filename)
+                st = os.stat(path)
+                source = {"size": st.st_size, "mtime": st.st_mtime}
+                if not force and sources.get(path) == source:
+                    stats.skipped_files += 1
+                    continue
+                print(f"Чтение дампа: {filename}")
+                pairs = _iter_dump_pairs(path, stats)
+                if validate:
+                    pairs = _checked_pairs(pairs, stats)
+                # Ключ сортировки: номер сегмента, затем адрес
+                sorter.extend(f"{shard_of(a, num_shards):04d}{a} {k}" for a, k in pairs)
+                sources[path] = source
+                stats.files += 1
+
+            new_lines = sorter.sorted_lines()
+            if store:
+                # Сегменты уже отсортированы - сливаем их с новыми записями без пересортировки
+                existing = (f"{shard:04d}{a} {k}" for shard, a, k in store.iter_records())
+                merged = heapq.merge(existing, new_lines)
+            else:
+                merged = new_lines
+            counts = _write_segments(merged, tmp_dir, num_shards, stats)
+
+        if store:
+            stats.existing = store.count
+        manifest = {
+            "created_at": datetime.now().isoformat(),
+            "shards": num_shards,
+            "record_size": RECORD_SIZE,
+            "index_interval": INDEX_INTERVAL,
+            "counts": counts,
+            "sources": sources
+        }
+        with open(os.path.join(tmp_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+    except BaseException:
+        # Неудачная сборка не должна оставлять временные сегменты
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    # Замена старого архива новым
+    old_dir = f"{directory.rstrip(os.sep)}.old"
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(directory):
+        os.rename(directory, old_dir)
+    os.rename(tmp_dir, directory)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return stats
+
+
+def _key_matches(address: str, private_key: str) -> bool:
+    """Соответствует ли приватный ключ адресу (проверка через tronpy)"""
+    from tronpy.keys import PrivateKey
+    try:
+        return PrivateKey(bytes.fromhex(private_key)).public_key.to_base58check_address() == address
+    except Exception:
+        return False
+
+
+def _choose_key(address: str, keys: List[str]) -> str:
+    """Выбирает ключ для адреса, встреченного с разными приватными ключами"""
+    try:
+        for private_key in keys:
+            if _key_matches(address, private_key):
+                return private_key
+    except ImportError:
+        pass
+    return keys[0]
+
+
+def _write_segments(lines: Iterator[str], directory: str, num_shards: int, stats: CompactStats) -> List[int]:
+    """Записывает отсортированные строки "SSSSадрес ключ" по сегментам, пропуская повторы адреса"""
+    counts = [0] * num_shards
+    current = -1
+    seg = idx = None
+    try:
+        # Одинаковые адреса после сортировки идут подряд
+        for prefix, group in itertools.groupby(lines, key=lambda line: line[:4 + ADDRESS_LENGTH]):
+            shard = int(prefix[:4])
+            address = prefix[4:]
+            keys = [line[5 + ADDRESS_LENGTH:] for line in group]
+            stats.duplicates += len(keys) - 1
+            private_key = keys[0]
+            if len(keys) > 1 and len(set(keys)) > 1:
+                stats.conflicts += 1
+                private_key = _choose_key(address, list(dict.fromkeys(keys)))
+
+            while current < shard:
+                if seg:
+                    seg.close()
+                    idx.close()
+                current += 1
+                seg = open(segment_path(directory, current), 'w', encoding='ascii', newline='\n')
+                idx = open(index_path(directory, current), 'wb')
+
+            if counts[shard] % INDEX_INTERVAL == 0:
+                idx.write(address.encode('ascii'))
+            seg.write(f"{address} {private_key}\n")
+            counts[shard] += 1
+            stats.written += 1
+    finally:
+        if seg:
+            seg.close()
+            idx.close()
+
+    # Пустые сегменты тоже создаются, чтобы поиск не проверял их наличие
+    for shard in range(current + 1, num_shards):
+        open(segment_path(directory, shard), 'w').close()
+        open(index_path(directory, shard), 'wb').close()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Сжатие архива дампов в сегменты без дубликатов')
+    parser.add_argument('--segments', default=SEGMENTS_DIR,
+                       help='Директория сегментов (по умолчанию: segments/)')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_build = sub.add_parser('build', help='Добавить дампы в архив сегментов')
+    p_build.add_argument('files', nargs='*',
+                         help='Файлы дампов (по умолчанию: все файлы из --directory, old/ и old_1/)')
+    p_build.add_argument('--directory', '-d', default=os.path.join(BASE_DIR, "addresses"),
+                         help='Директория для поиска файлов с адресами')
+    p_build.add_argument('--pattern', '-p', default='addresses*.txt',
+                         help='Шаблон имени файлов (по умолчанию: addresses*.txt)')
+    p_build.add_argument('--shards', type=int, default=DEFAULT_SHARDS,
+                         help=f'Число сегментов для нового архива (по умолчанию: {DEFAULT_SHARDS})')
+    p_build.add_argument('--run-size', type=int, default=100000,
+                         help='Количество записей в памяти до сброса на диск при сортировке (по умолчанию: 100000)')
+    p_build.add_argument('--validate', action='store_true',
+                         help='Пропускать адреса с неверной контрольной суммой Base58Check (требует numpy)')
+    p_build.add_argument('--force', action='store_true',
+                         help='Читать заново и файлы, уже вошедшие в архив')
+
+    p_lookup = sub.add_parser('lookup', help='Найти приватные ключи адресов в архиве')
+    p_lookup.add_argument('addresses', nargs='+', help='Адреса')
+
+    sub.add_parser('stats', help='Статистика архива')
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        files = args.files
+        if not files:
+            files = AddressFinder(PatternMatcher()).find_files(args.directory, args.pattern)
+        if not files:
+            sys.exit(1)
+
+        stats = compact(files, args.segments, args.shards, args.run_size, args.validate, args.force)
+        print(f"\n✅ Архив сегментов: {args.segments}")
+        print(f"   Прочитано файлов: {stats.files} (пропущено неизменённых: {stats.skipped_files})")
+        print(f"   Прочитано строк: {stats.lines:,}")
+        print(f"   Отброшено некорректных строк: {stats.malformed:,}")
+        if args.validate:
+            print(f"   Отброшено адресов с неверной контрольной суммой: {stats.invalid:,}")
+        print(f"   Было в архиве: {stats.existing:,}")
+        print(f"   Удалено дубликатов: {stats.duplicates:,}")
+        if stats.conflicts:
+            print(f"   ⚠️  Адресов с разными приватными ключами: {stats.conflicts:,} (оставлен ключ, из которого получается адрес)")
+        print(f"   Записей в архиве: {stats.written:,}")
+
+    elif args.command == 'lookup':
+        store = SegmentStore(args.segments)
+        missing = 0
+        for address in args.addresses:
+            private_key = store.lookup(address)
+            if private_key is None:
+                missing += 1
+                print(f"{address}: не найден")
+            else:
+                print(f"{address}: {private_key}")
+        if missing:
+            sys.exit(1)
+
+    elif args.command == 'stats':
+        store = SegmentStore(args.segments)
+        counts = store.manifest["counts"]
+        print(f"Архив сегментов: {args.segments}")
+        print(f"  Собран: {store.manifest['created_at']}")
+        print(f"  Записей: {store.count:,} в {store.num_shards} сегментах "
+              f"(от {min(counts):,} до {max(counts):,})")
+        print(f"  Исходных файлов: {len(store.sources)}")
+
+
+if __name__ == "__main__":
+    main()
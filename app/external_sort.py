@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+import os
+import heapq
+import shutil
+import tempfile
+from typing import Iterable, Iterator, List, Optional
+
+
+class ExternalSorter:
+    """Внешняя сортировка строк с ограниченным потреблением памяти.
+
+    Строки накапливаются в буфере размером не более run_size. Заполненный
+    буфер сортируется и сбрасывается на диск отдельным отрезком (run), а
+    итоговый порядок получается k-путевым слиянием отрезков. Строки
+    сравниваются лексикографически и не должны содержать перевода строки.
+    """
+
+    def __init__(self, run_size: int = 100000, tmp_dir: Optional[str] = None, max_fan_in: int = 64):
+        if run_size < 1:
+            raise ValueError("run_size должен быть положительным")
+        if max_fan_in < 2:
+            raise ValueError("max_fan_in должен быть не меньше 2")
+        self.run_size = run_size
+        self.max_fan_in = max_fan_in
+        self.work_dir = tempfile.mkdtemp(prefix="extsort_", dir=tmp_dir)
+        self.buffer: List[str] = []
+        self.runs: List[str] = []
+        self.count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cleanup()
+
+    def add(self, line: str):
+        """Добавляет строку для сортировки"""
+        self.buffer.append(line)
+        self.count += 1
+        if len(self.buffer) >= self.run_size:
+            self._spill()
+
+    def extend(self, lines: Iterable[str]):
+        """Добавляет несколько строк"""
+        for line in lines:
+            self.add(line)
+
+    def _new_run_path(self) -> str:
+        fd, path = tempfile.mkstemp(prefix="run_", suffix=".txt", dir=self.work_dir)
+        os.close(fd)
+        return path
+
+    def _spill(self):
+        """Сортирует буфер и сохраняет его на диск как отдельный отрезок"""
+        if not self.buffer:
+            return
+        self.buffer.sort()
+        path = self._new_run_path()
+        with open(path, 'w', encoding='utf-8') as f:
+            for line in self.buffer:
+                f.write(line)
+                f.write("\n")
+        self.runs.append(path)
+        self.buffer = []
+
+    @staticmethod
+    def _read_run(f) -> Iterator[str]:
+        for line in f:
+            yield line[:-1]
+
+    def _merge_runs(self, paths: List[str]) -> str:
+        """Сливает несколько отрезков в один новый отрезок"""
+        out_path = self._new_run_path()
+        files = [open(p, 'r', encoding='utf-8') for p in paths]
+        try:
+            with open(out_path, 'w', encoding='utf-8') as out:
+                for line in heapq.merge(*[self._read_run(f) for f in files]):
+                    out.write(line)
+                    out.write("\n")
+        finally:
+            for f in files:
+                f.close()
+        for p in paths:
+            os.remove(p)
+        return out_path
+
+    def sorted_lines(self) -> Iterator[str]:
+        """Возвращает все добавленные строки в отсортированном порядке"""
+        if not self.runs:
+            # Всё поместилось в память - диск не нужен
+            self.buffer.sort()
+            yield from self.buffer
+            return
+
+        self._spill()
+        # Многопроходное слияние, чтобы не упереться в лимит открытых файлов
+        while len(self.runs) > self.max_fan_in:
+            batch = self.runs[:self.max_fan_in]
+            self.runs = self.runs[self.max_fan_in:] + [self._merge_runs(batch)]
+
+        files = [open(p, 'r', encoding='utf-8') for p in self.runs]
+        try:
+            yield from heapq.merge(*[self._read_run(f) for f in files])
+        finally:
+            for f in files:
+                f.close()
+
+    def cleanup(self):
+        """Удаляет временные файлы"""
+        self.buffer = []
+        self.runs = []
+        shutil.rmtree(self.work_dir, ignore_errors=True)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+import os
+import json
+from array import array
+from datetime import datetime
+from typing import Dict, Iterator, List
+import numpy as np
+from pattern_matcher import PatternMatcher, FEATURE_TYPES
+from result_writer import BeautifulResult
+
+FEATURES_FILE = "features.npz"
+META_FILE = "meta.json"
+# Нижний порог оценки для попадания в кэш: ниже рабочего min_score, чтобы
+# после изменения множителей кандидаты не терялись
+DEFAULT_FLOOR = 30
+
+
+class FeatureCache:
+    """Кэш векторов признаков адресов-кандидатов.
+
+    Оценка адреса - скалярное произведение вектора признаков на множители
+    из patterns.json, поэтому после изменения множителей пересчёт всех
+    кандидатов - одно матричное умножение. При изменении списков слов,
+    окончаний или min_length пересчитываются только затронутые признаки.
+    Адреса, не прошедшие floor при сборке, в кэш не попадают: если новые
+    параметры могут поднять их оценку, кэш нужно собрать заново.
+    """
+
+    def __init__(self, features: np.ndarray, addresses: np.ndarray, private_keys: np.ndarray,
+                 file_ids: np.ndarray, lines: np.ndarray, files: List[str],
+                 signatures: Dict[str, str], floor: float):
+        self.features = features
+        self.addresses = addresses
+        self.private_keys = private_keys
+        self.file_ids = file_ids
+        self.lines = lines
+        self.files = files
+        self.signatures = signatures
+        self.floor = floor
+
+    def __len__(self) -> int:
+        return self.features.shape[0]
+
+    @classmethod
+    def load(cls, cache_dir: str) -> "FeatureCache":
+        with open(os.path.join(cache_dir, META_FILE), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta["feature_types"] != FEATURE_TYPES:
+            raise ValueError("Кэш собран для другого набора признаков, соберите его заново")
+        with np.load(os.path.join(cache_dir, FEATURES_FILE)) as data:
+            return cls(data["features"], data["addresses"], data["private_keys"],
+                       data["file_ids"], data["lines"], meta["files"], meta["signatures"], meta["floor"])
+
+    def save(self, cache_dir: str):
+        os.makedirs(cache_dir, exist_ok=True)
+        np.savez(os.path.join(cache_dir, FEATURES_FILE),
+                 features=self.features, addresses=self.addresses, private_keys=self.private_keys,
+                 file_ids=self.file_ids, lines=self.lines)
+        meta = {
+            "created_at": datetime.now().isoformat(),
+            "count": len(self),
+            "feature_types": FEATURE_TYPES,
+            "signatures": self.signatures,
+            "floor": self.floor,
+            "files": self.files
+        }
+        with open(os.path.join(cache_dir, META_FILE), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2, ensure_ascii=False)
+
+    def stale_features(self, matcher: PatternMatcher) -> List[str]:
+        """Признаки, параметры которых изменились с момента сборки"""
+        return [feature for feature in FEATURE_TYPES
+                if self.signatures.get(feature) != matcher.feature_signature(feature)]
+
+    def refresh(self, matcher: PatternMatcher) -> List[str]:
+        """Пересчитывает устаревшие признаки для закэшированных адресов"""
+        stale = self.stale_features(matcher)
+        if not stale:
+            return stale
+        addresses = [a.decode('ascii') for a in self.addresses]
+        for feature in stale:
+            column = FEATURE_TYPES.index(feature)
+            self.features[:, column] = [matcher.feature_vector(a, [feature])[0] for a in addresses]
+            self.signatures[feature] = matcher.feature_signature(feature)
+        return stale
+
+    def scores(self, matcher: PatternMatcher) -> np.ndarray:
+        """Оценки всех кандидатов при текущих множителях"""
+        return self.features.astype(np.int64) @ np.asarray(matcher.weights(), dtype=np.int64)
+
+    def iter_results(self, matcher: PatternMatcher, min_score: int = 50) -> Iterator[BeautifulResult]:
+        """Красивые адреса по текущим параметрам в исходном порядке сканирования"""
+        self.refresh(matcher)
+        scores = self.scores(matcher)
+        for i in np.flatnonzero(scores >= min_score):
+            address = self.addresses[i].decode('ascii')
+            # Паттерны нужны только для отобранных адресов
+            analysis = matcher.analyze_address(address)
+            yield BeautifulResult(
+                self.files[self.file_ids[i]],
+                int(self.lines[i]),
+                address,
+                self.private_keys[i].decode('ascii'),
+                analysis["score"],
+                BeautifulResult.compact_patterns(analysis["patterns_found"])
+            )
+
+
+class FeatureCacheBuilder:
+    """Накопление кандидатов при сканировании дампов в компактных массивах"""
+
+    def __init__(self, matcher: PatternMatcher, floor: float = DEFAULT_FLOOR):
+        self.weights = matcher.weights()
+        self.signatures = {feature: matcher.feature_signature(feature) for feature in FEATURE_TYPES}
+        self.floor = floor
+        self.features = array('H')
+        self.addresses = bytearray()
+        self.private_keys = bytearray()
+        self.file_ids = array('I')
+        self.lines = array('I')
+        self.files: List[str] = []
+        self._file_index: Dict[str, int] = {}
+        self.count = 0
+
+    def add(self, filename: str, line: int, address: str, private_key: str, features: List[int]):
+        """Добавляет адрес, если его оценка не ниже floor"""
+        if sum(w * f for w, f in zip(self.weights, features)) < self.floor:
+            return
+        if len(address) != 34 or len(private_key) != 64:
+            return
+        file_id = self._file_index.get(filename)
+        if file_id is None:
+            file_id = self._file_index[filename] = len(self.files)
+            self.files.append(filename)
+        self.features.extend(min(f, 0xFFFF) for f in features)
+        self.addresses += address.encode('ascii', 'replace')
+        self.private_keys += private_key.encode('ascii', 'replace')
+        self.file_ids.append(file_id)
+        self.lines.append(line)
+        self.count += 1
+
+    def build(self) -> FeatureCache:
+        return FeatureCache(
+            np.frombuffer(self.features, dtype=np.uint16).reshape(self.count, len(FEATURE_TYPES)).copy(),
+            np.frombuffer(bytes(self.addresses), dtype='S34'),
+            np.frombuffer(bytes(self.private_keys), dtype='S64'),
+            np.frombuffer(self.file_ids, dtype=np.uint32).copy(),
+            np.frombuffer(self.lines, dtype=np.uint32).copy(),
+            list(self.files),
+            dict(self.signatures),
+            self.floor
+        )
@@ -0,0 +1,522 @@
+#!/usr/bin/env python3
+import os
+import sys
+import time
+import json
+import uuid
+import queue
+import socket
+import argparse
+import logging
+import threading
+import multiprocessing
+import http.client
+import socketserver
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+from pattern_matcher import PatternMatcher, VanityTarget
+from machine_profile import DEFAULT_SETTINGS, load_settings
+from key_backends import KEY_BACKENDS, get_backend
+
+# Определяем базовую директорию (на уровень выше, так как этот файл в app/)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+# Настройка логирования для всего скрипта (общий лог)
+LOG_DIR = os.path.join(BASE_DIR, "logs")
+if not os.path.exists(LOG_DIR):
+    os.makedirs(LOG_DIR)
+LOG_FILE = os.path.join(LOG_DIR, "generator_daemon.log")
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+    handlers=[
+        logging.FileHandler(LOG_FILE),
+        logging.StreamHandler()
+    ]
+)
+
+JOBS_DIR = os.path.join(BASE_DIR, "addresses", "jobs")
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+def key_worker(worker_id: int, commands, hits, generated, patterns_file: Optional[str],
+               batch_size: int = DEFAULT_SETTINGS["batch_size"],
+               key_backend: str = DEFAULT_SETTINGS["key_backend"]):
+    """
+    Процесс-воркер: генерирует единый поток ключей и проверяет каждый адрес
+    сразу по всем активным заказам. Без активных заказов спит на очереди команд,
+    обновления таблицы заказов проверяет раз в пачку из batch_size ключей.
+    """
+    backend = get_backend(key_backend)
+    matcher = PatternMatcher(patterns_file)
+    targets: List[Tuple[str, VanityTarget]] = []
+    logging.info(f"Воркер {worker_id}: запуск")
+
+    while True:
+        # Получаем обновления таблицы заказов; без заказов блокируемся
+        try:
+            while True:
+                message = commands.get(block=not targets)
+                if message is None:
+                    logging.info(f"Воркер {worker_id}: остановка")
+                    return
+                targets = [(job_id, VanityTarget.from_dict(spec)) for job_id, spec in message]
+                if not targets:
+                    continue
+                if commands.empty():
+                    break
+        except queue.Empty:
+            pass
+
+        needs_score = any(target.needs_score for _, target in targets)
+        for private_key, address in backend.generate_addresses(batch_size):
+            analysis = matcher.analyze_address(address) if needs_score else None
+            score = analysis["score"] if analysis else None
+            matched = [job_id for job_id, target in targets if target.matches(address, score)]
+            if matched:
+                hits.put((matched, address, private_key, score,
+                          analysis["patterns_found"] if analysis else None))
+
+        with generated.get_lock():
+            generated.value += batch_size
+
+
+class Job:
+    """Заказ на поиск адреса"""
+
+    def __init__(self, target: VanityTarget, priority: int = 0, deadline: Optional[float] = None,
+                 max_results: int = 1, job_id: Optional[str] = None):
+        self.id = job_id or uuid.uuid4().hex[:12]
+        self.target = target
+        self.priority = priority
+        self.deadline = deadline
+        self.max_results = max_results
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.status = "active"
+        self.results: List[Dict] = []
+
+    @property
+    def is_active(self) -> bool:
+        return self.status == "active"
+
+    def schedule_key(self) -> tuple:
+        """Ключ выбора заказа для адреса, подходящего нескольким заказам"""
+        deadline = self.deadline if self.deadline is not None else float("inf")
+        return (-self.priority, deadline, len(self.results) / self.max_results, self.created_at)
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "target": self.target.to_dict(),
+            "priority": self.priority,
+            "deadline": self.deadline,
+            "max_results": self.max_results,
+            "found": len(self.results),
+            "created_at": self.created_at,
+            "finished_at": self.finished_at
+        }
+
+
+class JobRegistry:
+    """Реестр заказов с планированием найденных адресов между ними"""
+
+    def __init__(self, jobs_dir: str = JOBS_DIR):
+        self.jobs_dir = jobs_dir
+        self.jobs: Dict[str, Job] = {}
+        self.changed = threading.Condition()
+        os.makedirs(self.jobs_dir, exist_ok=True)
+
+    def submit(self, job: Job) -> Job:
+        with self.changed:
+            self.jobs[job.id] = job
+            self.changed.notify_all()
+        logging.info(f"Заказ {job.id}: принят {job.target.to_dict()} (priority={job.priority})")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self.changed:
+            return self.jobs.get(job_id)
+
+    def list(self) -> List[Dict]:
+        with self.changed:
+            return [job.to_dict() for job in self.jobs.values()]
+
+    def _finish(self, job: Job, status: str):
+        job.status = status
+        job.finished_at = time.time()
+        logging.info(f"Заказ {job.id}: {status}, найдено {len(job.results)}")
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        with self.changed:
+            job = self.jobs.get(job_id)
+            if job and job.is_active:
+                self._finish(job, "cancelled")
+                self.changed.notify_all()
+            return job
+
+    def expire(self, now: Optional[float] = None) -> bool:
+        """Завершает заказы с истёкшим сроком; возвращает True, если что-то изменилось"""
+        now = now or time.time()
+        expired = False
+        with self.changed:
+            for job in self.jobs.values():
+                if job.is_active and job.deadline is not None and job.deadline <= now:
+                    self._finish(job, "expired")
+                    expired = True
+            if expired:
+                self.changed.notify_all()
+        return expired
+
+    def active_targets(self) -> List[Tuple[str, Dict]]:
+        """Таблица активных заказов для рассылки воркерам"""
+        with self.changed:
+            return [(job.id, job.target.to_dict()) for job in self.jobs.values() if job.is_active]
+
+    def assign(self, job_ids: List[str], address: str, private_key: str,
+               score: Optional[int], patterns: Optional[List[Dict]]) -> Optional[Job]:
+        """
+        Отдаёт адрес одному заказу: ключ нельзя продать дважды. Выигрывает
+        больший приоритет, затем более ранний дедлайн, затем заказ с меньшей
+        долей выполнения. Возвращает заказ, получивший адрес.
+        """
+        with self.changed:
+            candidates = [self.jobs[j] for j in job_ids if j in self.jobs and self.jobs[j].is_active]
+            if not candidates:
+                return None
+            job = min(candidates, key=Job.schedule_key)
+            result = {
+                "found_at": time.time(),
+                "address": address,
+                "private_key": private_key,
+                "score": score,
+                "patterns": patterns
+            }
+            job.results.append(result)
+            with open(os.path.join(self.jobs_dir, f"{job.id}.jsonl"), 'a') as f:
+                f.write(json.dumps(result) + "\n")
+            if len(job.results) >= job.max_results:
+                self._finish(job, "done")
+            self.changed.notify_all()
+            return job
+
+
+class GeneratorDaemon:
+    """Демон с прогретым пулом воркеров и общим потоком ключей для всех заказов"""
+
+    def __init__(self, workers: int, patterns_file: Optional[str] = None,
+                 batch_size: int = DEFAULT_SETTINGS["batch_size"],
+                 key_backend: str = DEFAULT_SETTINGS["key_backend"]):
+        self.registry = JobRegistry()
+        self.hits = multiprocessing.Queue()
+        self.generated = multiprocessing.Value('Q', 0)
+        self.started_at = time.time()
+        self.stop_event = threading.Event()
+        self.commands = []
+        self.processes = []
+        for i in range(1, workers + 1):
+            commands = multiprocessing.Queue()
+            p = multiprocessing.Process(
+                target=key_worker,
+                args=(i, commands, self.hits, self.generated, patterns_file, batch_size, key_backend),
+                daemon=True
+            )
+            p.start()
+            self.commands.append(commands)
+            self.processes.append(p)
+        self._published: List[Tuple[str, Dict]] = []
+        # publish вызывается из потоков HTTP и диспетчера: расчёт, сравнение
+        # и рассылка таблицы должны идти целиком, иначе воркеры получат устаревшую
+        self._publish_lock = threading.Lock()
+        self.dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+        self.dispatcher.start()
+
+    def publish(self):
+        """Рассылает воркерам актуальную таблицу заказов, если она изменилась"""
+        with self._publish_lock:
+            table = self.registry.active_targets()
+            if table != self._published:
+                self._published = table
+                for commands in self.commands:
+                    commands.put(table)
+
+    def _dispatch(self):
+        while not self.stop_event.is_set():
+            try:
+                job_ids, address, private_key, score, patterns = self.hits.get(timeout=0.5)
+            except queue.Empty:
+                pass
+            else:
+                job = self.registry.assign(job_ids, address, private_key, score, patterns)
+                if job:
+                    logging.info(f"Заказ {job.id}: найден адрес {address}")
+            self.registry.expire()
+            self.publish()
+
+    def submit(self, spec: Dict) -> Job:
+        if not isinstance(spec, dict):
+            raise TypeError("заказ должен быть JSON-объектом")
+        target = VanityTarget.from_dict(spec)
+        deadline = spec.get("deadline")
+        if deadline is None and spec.get("timeout") is not None:
+            deadline = time.time() + float(spec["timeout"])
+        job = Job(
+            target,
+            priority=int(spec.get("priority", 0)),
+            deadline=float(deadline) if deadline is not None else None,
+            max_results=max(1, int(spec.get("max_results", 1)))
+        )
+        self.registry.submit(job)
+        self.publish()
+        return job
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self.registry.cancel(job_id)
+        self.publish()
+        return job
+
+    def stats(self) -> Dict:
+        elapsed = time.time() - self.started_at
+        jobs = self.registry.list()
+        return {
+            "workers": len(self.processes),
+            "uptime": elapsed,
+            "generated": self.generated.value,
+            "speed": self.generated.value / elapsed if elapsed > 0 else 0,
+            "active_jobs": sum(1 for job in jobs if job["status"] == "active"),
+            "total_jobs": len(jobs)
+        }
+
+    def shutdown(self):
+        self.stop_event.set()
+        for commands in self.commands:
+            commands.put(None)
+        for p in self.processes:
+            p.join(timeout=5)
+            if p.is_alive():
+                p.terminate()
+
+
+class DaemonRequestHandler(BaseHTTPRequestHandler):
+    """
+    Локальный JSON API:
+      POST   /jobs               - создать заказ
+      GET    /jobs               - список заказов
+      GET    /jobs/<id>          - состояние заказа и найденные адреса
+      DELETE /jobs/<id>          - отменить заказ
+      GET    /jobs/<id>/results  - поток найденных адресов (NDJSON) до завершения заказа
+      GET    /stats              - статистика демона
+    """
+
+    daemon: GeneratorDaemon = None
+    protocol_version = "HTTP/1.0"
+
+    def address_string(self):
+        # У Unix-сокета нет адреса клиента
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        logging.debug(f"API {self.address_string()}: {format % args}")
+
+    def _send_json(self, status: int, data):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _route(self) -> Tuple[List[str], Dict]:
+        url = urlparse(self.path)
+        return [p for p in url.path.split('/') if p], parse_qs(url.query)
+
+    def do_GET(self):
+        parts, _ = self._route()
+        if parts == ["stats"]:
+            return self._send_json(200, self.daemon.stats())
+        if parts == ["jobs"]:
+            return self._send_json(200, self.daemon.registry.list())
+        if len(parts) >= 2 and parts[0] == "jobs":
+            job = self.daemon.registry.get(parts[1])
+            if job is None:
+                return self._send_json(404, {"error": "заказ не найден"})
+            if len(parts) == 2:
+                data = job.to_dict()
+                data["results"] = list(job.results)
+                return self._send_json(200, data)
+            if len(parts) == 3 and parts[2] == "results":
+                return self._stream_results(job)
+        self._send_json(404, {"error": "неизвестный путь"})
+
+    def _stream_results(self, job: Job):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        registry = self.daemon.registry
+        sent = 0
+        try:
+            while True:
+                with registry.changed:
+                    while sent == len(job.results) and job.is_active:
+                        registry.changed.wait(timeout=1.0)
+                    pending = job.results[sent:]
+                    active = job.is_active
+                for result in pending:
+                    self.wfile.write((json.dumps(result) + "\n").encode('utf-8'))
+                self.wfile.flush()
+                sent += len(pending)
+                if not active and sent == len(job.results):
+                    break
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def do_POST(self):
+        parts, _ = self._route()
+        if parts != ["jobs"]:
+            return self._send_json(404, {"error": "неизвестный путь"})
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            spec = json.loads(self.rfile.read(length) or b"{}")
+            job = self.daemon.submit(spec)
+        except (ValueError, TypeError) as e:
+            return self._send_json(400, {"error": str(e)})
+        self._send_json(201, job.to_dict())
+
+    def do_DELETE(self):
+        parts, _ = self._route()
+        if len(parts) == 2 and parts[0] == "jobs":
+            job = self.daemon.cancel(parts[1])
+            if job is None:
+                return self._send_json(404, {"error": "заказ не найден"})
+            return self._send_json(200, job.to_dict())
+        self._send_json(404, {"error": "неизвестный путь"})
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP-соединение через Unix-сокет для клиента"""
+
+    def __init__(self, socket_path: str, timeout: Optional[float] = None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.socket_path)
+
+
+def make_server(daemon: GeneratorDaemon, host: str, port: int, socket_path: Optional[str]):
+    handler = type("Handler", (DaemonRequestHandler,), {"daemon": daemon})
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        return UnixHTTPServer(socket_path, handler)
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def api_request(args, method: str, path: str, body: Optional[Dict] = None):
+    """Выполняет запрос к демону и возвращает ответ"""
+    if args.socket:
+        conn = UnixHTTPConnection(args.socket)
+    else:
+        conn = http.client.HTTPConnection(args.host, args.port)
+    payload = json.dumps(body).encode('utf-8') if body is not None else None
+    headers = {"Content-Type": "application/json"} if payload else {}
+    conn.request(method, path, body=payload, headers=headers)
+    return conn.getresponse()
+
+
+def serve(args):
+    # Настройки из профиля машины (см. calibrate.py); явные аргументы важнее
+    settings = load_settings()
+    workers = args.workers or (settings["processes"] if settings else os.cpu_count() or 1)
+    batch_size = settings["batch_size"] if settings else DEFAULT_SETTINGS["batch_size"]
+    key_backend = args.key_backend or (settings or DEFAULT_SETTINGS)["key_backend"]
+    daemon = GeneratorDaemon(workers, args.patterns_file, batch_size, key_backend)
+    server = make_server(daemon, args.host, args.port, args.socket)
+    where = args.socket or f"http://{args.host}:{args.port}"
+    logging.info(f"Демон генератора запущен: {where}, воркеров: {workers}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logging.info("Остановка демона...")
+    finally:
+        server.server_close()
+        daemon.shutdown()
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Демон генератора TRON адресов с локальным API заказов')
+    parser.add_argument('--host', default=DEFAULT_HOST, help='Адрес HTTP API (по умолчанию: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='Порт HTTP API (по умолчанию: 8765)')
+    parser.add_argument('--socket', help='Путь к Unix-сокету вместо TCP')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_serve = sub.add_parser('serve', help='Запустить демон')
+    p_serve.add_argument('--workers', '-w', type=int,
+                         help='Количество процессов-воркеров (по умолчанию: из профиля машины или число ядер)')
+    p_serve.add_argument('--patterns-file', '-p', help='Файл с настройками паттернов (JSON)')
+    p_serve.add_argument('--key-backend', choices=sorted(KEY_BACKENDS),
+                         help='Источник ключей: tronpy или table (по умолчанию: из профиля или tronpy)')
+
+    p_submit = sub.add_parser('submit', help='Создать заказ')
+    p_submit.add_argument('--prefix', default='', help='Начало адреса после T')
+    p_submit.add_argument('--suffix', default='', help='Окончание адреса')
+    p_submit.add_argument('--contains', action='append', help='Подстрока в адресе (можно несколько)')
+    p_submit.add_argument('--min-score', type=int, help='Минимальная оценка PatternMatcher')
+    p_submit.add_argument('--ignore-case', action='store_true', help='Без учёта регистра')
+    p_submit.add_argument('--priority', type=int, default=0, help='Приоритет (больше - важнее)')
+    p_submit.add_argument('--timeout', type=float, help='Срок выполнения в секундах')
+    p_submit.add_argument('--max-results', type=int, default=1, help='Сколько адресов нужно')
+
+    sub.add_parser('list', help='Список заказов')
+    sub.add_parser('stats', help='Статистика демона')
+    p_cancel = sub.add_parser('cancel', help='Отменить заказ')
+    p_cancel.add_argument('job_id')
+    p_results = sub.add_parser('results', help='Ждать и выводить найденные адреса заказа')
+    p_results.add_argument('job_id')
+
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        return serve(args)
+
+    if args.command == 'submit':
+        spec = {
+            "prefix": args.prefix,
+            "suffix": args.suffix,
+            "contains": args.contains or [],
+            "min_score": args.min_score,
+            "case_sensitive": not args.ignore_case,
+            "priority": args.priority,
+            "timeout": args.timeout,
+            "max_results": args.max_results
+        }
+        response = api_request(args, "POST", "/jobs", spec)
+    elif args.command == 'list':
+        response = api_request(args, "GET", "/jobs")
+    elif args.command == 'stats':
+        response = api_request(args, "GET", "/stats")
+    elif args.command == 'cancel':
+        response = api_request(args, "DELETE", f"/jobs/{args.job_id}")
+    else:
+        response = api_request(args, "GET", f"/jobs/{args.job_id}/results")
+        for line in response:
+            print(line.decode('utf-8').rstrip())
+        return
+
+    print(json.dumps(json.loads(response.read()), indent=2, ensure_ascii=False))
+    if response.status >= 400:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
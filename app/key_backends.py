@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+import os
+import sys
+import mmap
+import time
+import hashlib
+import secrets
+import argparse
+from typing import List, Optional, Sequence, Tuple
+
+# Определяем базовую директорию (на уровень выше, так как этот файл в app/)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+TABLE_FILE = os.path.join(BASE_DIR, "cache", "g_table_w8.bin")
+
+# Параметры кривой secp256k1
+P = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEFFFFFC2F
+N = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+GX = 0x79BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798
+GY = 0x483ADA7726A3C4655DA4FBFC0E1108A8FD17B448A68554199C47D08FFB10D4B8
+
+# Фиксированное окно 8 бит: 32 окна по 256 точек j * 256^i * G
+WINDOW_BITS = 8
+WINDOWS = 256 // WINDOW_BITS
+WINDOW_SIZE = 1 << WINDOW_BITS
+POINT_SIZE = 64
+TABLE_MAGIC = b"TRONGTB1"
+HEADER_SIZE = 16
+TABLE_SIZE = HEADER_SIZE + WINDOWS * WINDOW_SIZE * POINT_SIZE
+
+TRON_PREFIX = b"\x41"
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+
+def keccak256(data: bytes) -> bytes:
+    from Crypto.Hash import keccak
+    return keccak.new(data=data, digest_bits=256).digest()
+
+
+def base58check_encode(payload: bytes) -> str:
+    """Скалярный Base58Check (для пачек с numpy см. base58_batch)"""
+    data = payload + hashlib.sha256(hashlib.sha256(payload).digest()).digest()[:4]
+    value = int.from_bytes(data, 'big')
+    chars = []
+    while value:
+        value, rem = divmod(value, 58)
+        chars.append(BASE58_ALPHABET[rem])
+    pad = len(data) - len(data.lstrip(b"\0"))
+    return "1" * pad + "".join(reversed(chars))
+
+
+def payloads_to_addresses(payloads: List[bytes]) -> List[str]:
+    """Кодирует payload (0x41 + 20 байт) в адреса; пачкой через numpy, если он установлен"""
+    try:
+        import numpy as np
+        from base58_batch import encode_batch, to_strings
+    except ImportError:
+        return [base58check_encode(p) for p in payloads]
+    if not payloads:
+        return []
+    array = np.frombuffer(b"".join(payloads), dtype=np.uint8).reshape(len(payloads), 21)
+    return to_strings(encode_batch(array))
+
+
+# Арифметика в координатах Якоби: (X, Y, Z) -> (X/Z^2, Y/Z^3); Z == 0 - бесконечность
+
+def _jacobian_double(X1, Y1, Z1):
+    if Y1 == 0 or Z1 == 0:
+        return 0, 1, 0
+    YY = Y1 * Y1 % P
+    S = 4 * X1 * YY % P
+    M = 3 * X1 * X1 % P
+    X3 = (M * M - 2 * S) % P
+    Y3 = (M * (S - X3) - 8 * YY * YY) % P
+    Z3 = 2 * Y1 * Z1 % P
+    return X3, Y3, Z3
+
+
+def _jacobian_add_affine(X1, Y1, Z1, x2, y2):
+    """Смешанное сложение: точка в координатах Якоби + аффинная точка"""
+    if Z1 == 0:
+        return x2, y2, 1
+    Z1Z1 = Z1 * Z1 % P
+    U2 = x2 * Z1Z1 % P
+    S2 = y2 * Z1 * Z1Z1 % P
+    H = (U2 - X1) % P
+    R = (S2 - Y1) % P
+    if H == 0:
+        if R == 0:
+            return _jacobian_double(X1, Y1, Z1)
+        return 0, 1, 0
+    HH = H * H % P
+    HHH = H * HH % P
+    V = X1 * HH % P
+    X3 = (R * R - HHH - 2 * V) % P
+    Y3 = (R * (V - X3) - Y1 * HHH) % P
+    Z3 = Z1 * H % P
+    return X3, Y3, Z3
+
+
+def _to_affine_batch(points: Sequence[Tuple[int, int, int]]) -> List[Optional[Tuple[int, int]]]:
+    """Приведение к аффинным координатам с одной инверсией на пачку (трюк Монтгомери)"""
+    prefix = []
+    acc = 1
+    for _, _, Z in points:
+        prefix.append(acc)
+        if Z:
+            acc = acc * Z % P
+    inv = pow(acc, P - 2, P)
+    result: List[Optional[Tuple[int, int]]] = [None] * len(points)
+    for i in range(len(points) - 1, -1, -1):
+        X, Y, Z = points[i]
+        if not Z:
+            continue
+        z_inv = inv * prefix[i] % P
+        inv = inv * Z % P
+        z2 = z_inv * z_inv % P
+        result[i] = (X * z2 % P, Y * z2 * z_inv % P)
+    return result
+
+
+def build_table(path: str = TABLE_FILE):
+    """Строит таблицу кратных G и атомарно сохраняет её на диск"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    base = (GX, GY)
+    with open(tmp_path, 'wb') as f:
+        f.write(TABLE_MAGIC + WINDOW_BITS.to_bytes(4, 'big') + WINDOWS.to_bytes(4, 'big'))
+        for _ in range(WINDOWS):
+            # Кратные base: 1*base .. 255*base
+            points = [(base[0], base[1], 1)]
+            for _ in range(WINDOW_SIZE - 2):
+                points.append(_jacobian_add_affine(*points[-1], *base))
+            # Следующая база окна: 256 * base
+            points.append(_jacobian_add_affine(*points[-1], *base))
+            affine = _to_affine_batch(points)
+            f.write(bytes(POINT_SIZE))
+            for x, y in affine[:WINDOW_SIZE - 1]:
+                f.write(x.to_bytes(32, 'big') + y.to_bytes(32, 'big'))
+            base = affine[WINDOW_SIZE - 1]
+    os.replace(tmp_path, path)
+
+
+class KeyBackend:
+    """Источник случайных ключей: возвращает пары (приватный ключ hex, адрес)"""
+
+    name = ""
+
+    def generate_addresses(self, count: int) -> List[Tuple[str, str]]:
+        raise NotImplementedError
+
+    def generate_payloads(self, count: int) -> Tuple[List[str], List[bytes]]:
+        """Приватные ключи hex и payload адресов (0x41 + 20 байт) без кодирования в Base58"""
+        raise NotImplementedError
+
+
+class TronpyBackend(KeyBackend):
+    """Ключи через tronpy (PrivateKey.random)"""
+
+    name = "tronpy"
+
+    def __init__(self):
+        from tronpy.keys import PrivateKey
+        self.private_key_cls = PrivateKey
+
+    def generate_addresses(self, count: int) -> List[Tuple[str, str]]:
+        result = []
+        for _ in range(count):
+            priv_key = self.private_key_cls.random()
+            result.append((priv_key.hex(), priv_key.public_key.to_base58check_address()))
+        return result
+
+    def generate_payloads(self, count: int) -> Tuple[List[str], List[bytes]]:
+        private_keys, payloads = [], []
+        for _ in range(count):
+            priv_key = self.private_key_cls.random()
+            private_keys.append(priv_key.hex())
+            payloads.append(priv_key.public_key.to_address())
+        return private_keys, payloads
+
+
+class TableBackend(KeyBackend):
+    """
+    Умножение на G по предвычисленной таблице с окном 8 бит: 32 выборки
+    из таблицы и 32 смешанных сложения на ключ, одна инверсия на пачку.
+
+    Таблица (~512 КБ) строится один раз и отображается в память только для
+    чтения, поэтому все процессы-воркеры используют одни и те же страницы.
+    """
+
+    name = "table"
+
+    def __init__(self, path: str = TABLE_FILE):
+        if not os.path.exists(path) or os.path.getsize(path) != TABLE_SIZE:
+            build_table(path)
+        with open(path, 'rb') as f:
+            self.table = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.table[:len(TABLE_MAGIC)] != TABLE_MAGIC or self._point(0, 1) != (GX, GY):
+            raise ValueError(f"Повреждённая таблица {path}, удалите файл для пересборки")
+        self.path = path
+
+    def __getstate__(self):
+        # При передаче в другой процесс таблица заново отображается из файла, а не копируется
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+    def _point(self, window: int, digit: int) -> Tuple[int, int]:
+        offset = HEADER_SIZE + (window * WINDOW_SIZE + digit) * POINT_SIZE
+        raw = self.table[offset:offset + POINT_SIZE]
+        return int.from_bytes(raw[:32], 'big'), int.from_bytes(raw[32:], 'big')
+
+    def _multiply_jacobian(self, k: int) -> Tuple[int, int, int]:
+        X, Y, Z = 0, 1, 0
+        table = self.table
+        window = 0
+        while k:
+            digit = k & 0xFF
+            if digit:
+                offset = HEADER_SIZE + (window * WINDOW_SIZE + digit) * POINT_SIZE
+                x2 = int.from_bytes(table[offset:offset + 32], 'big')
+                y2 = int.from_bytes(table[offset + 32:offset + POINT_SIZE], 'big')
+                X, Y, Z = _jacobian_add_affine(X, Y, Z, x2, y2)
+            k >>= WINDOW_BITS
+            window += 1
+        return X, Y, Z
+
+    def public_keys(self, secrets_list: Sequence[int]) -> List[bytes]:
+        """Несжатые публичные ключи (x || y, 64 байта) для пачки приватных ключей"""
+        affine = _to_affine_batch([self._multiply_jacobian(k) for k in secrets_list])
+        return [x.to_bytes(32, 'big') + y.to_bytes(32, 'big') for x, y in affine]
+
+    def generate_payloads(self, count: int) -> Tuple[List[str], List[bytes]]:
+        keys = [secrets.randbelow(N - 1) + 1 for _ in range(count)]
+        payloads = [TRON_PREFIX + keccak256(pub)[-20:] for pub in self.public_keys(keys)]
+        return [k.to_bytes(32, 'big').hex() for k in keys], payloads
+
+    def generate_addresses(self, count: int) -> List[Tuple[str, str]]:
+        private_keys, payloads = self.generate_payloads(count)
+        return list(zip(private_keys, payloads_to_addresses(payloads)))
+
+
+KEY_BACKENDS = {
+    TronpyBackend.name: TronpyBackend,
+    TableBackend.name: TableBackend
+}
+
+
+def get_backend(name: str) -> KeyBackend:
+    if name not in KEY_BACKENDS:
+        raise ValueError(f"Неизвестный источник ключей {name!r}, доступны: {', '.join(KEY_BACKENDS)}")
+    return KEY_BACKENDS[name]()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Таблица кратных G для быстрой генерации ключей')
+    parser.add_argument('--build', action='store_true', help='Пересобрать таблицу')
+    parser.add_argument('--verify', type=int, default=1000, metavar='N',
+                       help='Сверить N случайных ключей с tronpy (по умолчанию: 1000)')
+    args = parser.parse_args()
+
+    if args.build or not os.path.exists(TABLE_FILE):
+        started = time.time()
+        build_table()
+        print(f"Таблица построена за {time.time() - started:.2f}с: {TABLE_FILE}")
+
+    from tronpy.keys import PrivateKey
+    table = TableBackend()
+    tronpy_backend = TronpyBackend()
+
+    # Сверка адресов по одним и тем же приватным ключам, включая граничные
+    keys = [1, 2, 255, 256, N - 1] + [secrets.randbelow(N - 1) + 1 for _ in range(args.verify)]
+    started = time.time()
+    generated = table.generate_addresses(args.verify)
+    table_time = time.time() - started
+    mismatches = 0
+    pairs = [(k.to_bytes(32, 'big').hex(), a) for k, a in zip(
+        keys, payloads_to_addresses([TRON_PREFIX + keccak256(pub)[-20:] for pub in table.public_keys(keys)]))]
+    for private_key, address in pairs + generated:
+        expected = PrivateKey(bytes.fromhex(private_key)).public_key.to_base58check_address()
+        if expected != address:
+            mismatches += 1
+            print(f"Расхождение: {private_key} -> {address}, tronpy: {expected}")
+
+    started = time.time()
+    tronpy_backend.generate_addresses(args.verify)
+    tronpy_time = time.time() - started
+
+    print(f"Проверено ключей: {len(pairs) + len(generated)}, расхождений: {mismatches}")
+    print(f"Скорость table:  {args.verify / table_time:,.0f} адр/сек")
+    print(f"Скорость tronpy: {args.verify / tronpy_time:,.0f} адр/сек")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+import os
+import json
+import logging
+import platform
+from datetime import datetime
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Определяем базовую директорию (на уровень выше, так как этот файл в app/)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+PROFILE_FILE = os.path.join(BASE_DIR, "profiles", "machine_profile.json")
+
+# Настройки, которые используются при отсутствии профиля
+DEFAULT_SETTINGS = {
+    "key_backend": "tronpy",
+    "processes": 1,
+    "batch_size": 256,
+    "flush_interval": 1.0
+}
+
+
+def cpu_model() -> str:
+    """Модель процессора (из /proc/cpuinfo на Linux)"""
+    try:
+        with open("/proc/cpuinfo", 'r') as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(':', 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def machine_fingerprint() -> Dict:
+    """Характеристики машины, при изменении которых профиль надо перепроверить"""
+    return {
+        "cpu_count": os.cpu_count() or 1,
+        "cpu_model": cpu_model(),
+        "machine": platform.machine()
+    }
+
+
+def save_profile(settings: Dict, measurements: List[Dict], profile_file: str = PROFILE_FILE):
+    """Сохраняет профиль машины с выбранными настройками и результатами замеров"""
+    os.makedirs(os.path.dirname(profile_file), exist_ok=True)
+    profile = {
+        "created_at": datetime.now().isoformat(),
+        "fingerprint": machine_fingerprint(),
+        "settings": settings,
+        "measurements": measurements
+    }
+    with open(profile_file, 'w', encoding='utf-8') as f:
+        json.dump(profile, f, indent=2, ensure_ascii=False)
+    return profile
+
+
+def read_profile(profile_file: str = PROFILE_FILE) -> Optional[Dict]:
+    """Читает профиль без проверки; None если файла нет или он повреждён"""
+    if not os.path.exists(profile_file):
+        return None
+    try:
+        with open(profile_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Не удалось прочитать профиль {profile_file}: {e}")
+        return None
+
+
+def load_settings(revalidate: bool = False, profile_file: str = PROFILE_FILE) -> Optional[Dict]:
+    """
+    Возвращает настройки из профиля машины. Если число ядер или модель
+    процессора изменились, профиль игнорируется, а при revalidate=True
+    перепроверяется быстрой калибровкой (только для запуска из командной
+    строки: замер занимает секунды и запускает процессы). None - профиля нет.
+    """
+    profile = read_profile(profile_file)
+    if profile is None:
+        return None
+
+    current = machine_fingerprint()
+    saved = profile.get("fingerprint", {})
+    if saved.get("cpu_count") == current["cpu_count"] and saved.get("cpu_model") == current["cpu_model"]:
+        return dict(DEFAULT_SETTINGS, **profile.get("settings", {}))
+
+    logger.warning(
+        f"Профиль машины устарел: было {saved.get('cpu_count')} ядер ({saved.get('cpu_model')}), "
+        f"сейчас {current['cpu_count']} ({current['cpu_model']})"
+    )
+    if not revalidate:
+        logger.warning("Профиль не используется; перепроверьте его: python3 app/calibrate.py --revalidate")
+        return None
+
+    from calibrate import revalidate_profile
+    return revalidate_profile(profile, profile_file)
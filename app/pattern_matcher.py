@@ -3,6 +3,111 @@ import re
 from typing import List, Dict, Tuple, Optional
 import json
 import os
+import hashlib
+from key_backends import BASE58_ALPHABET
+
+# Порядок признаков в векторе признаков адреса
+FEATURE_TYPES = [
+    "repeating_digits",
+    "repeating_letters",
+    "sequential_digits",
+    "words",
+    "mirror",
+    "special_ending",
+    "special_beginning"
+]
+
+# Название типа в patterns_found (для слов отличается от ключа настроек)
+PATTERN_TYPE_NAMES = {feature: feature for feature in FEATURE_TYPES}
+PATTERN_TYPE_NAMES["words"] = "word"
+
+# Параметры оценки по умолчанию; переопределяются секцией "patterns" в patterns.json
+DEFAULT_SCORING = {
+    "repeating_digits": {"score_multiplier": 10, "min_length": 5},
+    "repeating_letters": {"score_multiplier": 8, "min_length": 5},
+    "sequential_digits": {"score_multiplier": 12, "min_length": 5},
+    "words": {"score_multiplier": 15, "word_list": None},
+    "mirror": {"score_multiplier": 20, "min_length": 3},
+    "special_ending": {"score_multiplier": 10, "endings": None},
+    "special_beginning": {"score_multiplier": 10, "beginnings": None}
+}
+
+class VanityTarget:
+    """Цель поиска для заказа: префикс, окончание, подстроки и/или минимальная оценка.
+
+    Все заданные условия должны выполняться одновременно. Префикс
+    проверяется после обязательного символа 'T'.
+    """
+    
+    def __init__(self, prefix: str = "", suffix: str = "", contains: Optional[List[str]] = None,
+                 min_score: Optional[int] = None, case_sensitive: bool = True):
+        self.case_sensitive = case_sensitive
+        self.prefix = prefix if case_sensitive else prefix.upper()
+        self.suffix = suffix if case_sensitive else suffix.upper()
+        self.contains = [c if case_sensitive else c.upper() for c in (contains or [])]
+        self.min_score = min_score
+        if not (self.prefix or self.suffix or self.contains) and min_score is None:
+            raise ValueError("Нужно задать prefix, suffix, contains или min_score")
+        # Символы вне алфавита Base58 (0, O, I, l) в адресе не встречаются - такой заказ не завершится
+        alphabet = set(BASE58_ALPHABET if case_sensitive else BASE58_ALPHABET.upper())
+        for part in [self.prefix, self.suffix] + self.contains:
+            invalid = sorted(set(part) - alphabet)
+            if invalid:
+                raise ValueError(f"{part!r}: символы {''.join(invalid)!r} не встречаются в адресах TRON (Base58)")
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> "VanityTarget":
+        contains = data.get("contains") or []
+        if isinstance(contains, str):
+            contains = [contains]
+        if not isinstance(contains, list) or not all(isinstance(c, str) for c in contains):
+            raise TypeError("contains должен быть строкой или списком строк")
+        prefix = data.get("prefix") or ""
+        suffix = data.get("suffix") or ""
+        if not isinstance(prefix, str) or not isinstance(suffix, str):
+            raise TypeError("prefix и suffix должны быть строками")
+        min_score = data.get("min_score")
+        return cls(
+            prefix=prefix,
+            suffix=suffix,
+            contains=contains,
+            min_score=int(min_score) if min_score is not None else None,
+            case_sensitive=bool(data.get("case_sensitive", True))
+        )
+    
+    def to_dict(self) -> Dict:
+        return {
+            "prefix": self.prefix,
+            "suffix": self.suffix,
+            "contains": self.contains,
+            "min_score": self.min_score,
+            "case_sensitive": self.case_sensitive
+        }
+    
+    @property
+    def needs_score(self) -> bool:
+        return self.min_score is not None
+    
+    def matches_text(self, address: str) -> bool:
+        """Проверяет текстовые условия (без оценки паттернов)"""
+        text = address if self.case_sensitive else address.upper()
+        if self.prefix and not text.startswith(self.prefix, 1):
+            return False
+        if self.suffix and not text.endswith(self.suffix):
+            return False
+        for part in self.contains:
+            if part not in text:
+                return False
+        return True
+    
+    def matches(self, address: str, score: Optional[int] = None) -> bool:
+        """Полная проверка; score нужен, если задан min_score"""
+        if not self.matches_text(address):
+            return False
+        if self.min_score is not None:
+            return score is not None and score >= self.min_score
+        return True
+
 
 class PatternMatcher:
     """Класс для проверки адресов на соответствие красивым паттернам"""
@@ -14,6 +119,33 @@ class PatternMatcher:
                 self.patterns = json.load(f)
         else:
             self.patterns = self.default_patterns()
+        self.scoring = self.load_scoring()
+    
+    def load_scoring(self) -> Dict[str, Dict]:
+        """Параметры оценки по типам: множители, минимальные длины и списки"""
+        config = self.patterns.get("patterns", self.patterns)
+        scoring = {}
+        for feature in FEATURE_TYPES:
+            settings = dict(DEFAULT_SCORING[feature])
+            user = config.get(feature, {})
+            for key in settings:
+                if key in user:
+                    settings[key] = user[key]
+            multiplier = settings["score_multiplier"]
+            # Оценки везде целые (min_score, ключ сортировки результатов)
+            if isinstance(multiplier, bool) or not isinstance(multiplier, int):
+                raise ValueError(f"score_multiplier для {feature} должен быть целым числом, получено {multiplier!r}")
+            scoring[feature] = settings
+        return scoring
+    
+    def weights(self) -> List[int]:
+        """Множители оценки в порядке FEATURE_TYPES"""
+        return [self.scoring[feature]["score_multiplier"] for feature in FEATURE_TYPES]
+    
+    def feature_signature(self, feature: str) -> str:
+        """Хэш параметров, влияющих на значение признака (без множителя)"""
+        params = {k: v for k, v in self.scoring[feature].items() if k != "score_multiplier"}
+        return hashlib.sha1(json.dumps(params, sort_keys=True).encode('utf-8')).hexdigest()[:16]
     
     def default_patterns(self) -> Dict[str, Dict]:
         """Возвращает паттерны по умолчанию"""
@@ -168,96 +300,61 @@ class PatternMatcher:
                     results.append((beginning, 1))
         return results
     
+    def find_matches(self, feature: str, address: str) -> List[Tuple[str, int, Optional[str]]]:
+        """Находки одного типа: (паттерн, длина для оценки, позиция или None)"""
+        settings = self.scoring[feature]
+        if feature == "repeating_digits":
+            return [(p, len(p), f"{start}-{end}")
+                    for p, start, end in self.check_repeating_digits(address, settings["min_length"])]
+        if feature == "repeating_letters":
+            return [(p, len(p), f"{start}-{end}")
+                    for p, start, end in self.check_repeating_letters(address, settings["min_length"])]
+        if feature == "sequential_digits":
+            return [(p, len(p), f"{start}-{end}")
+                    for p, start, end in self.check_sequential_digits(address, settings["min_length"])]
+        if feature == "words":
+            return [(word, len(word), f"{start}-{end}")
+                    for word, start, end in self.check_words(address, settings["word_list"])]
+        if feature == "mirror":
+            return [(f"{start_part}...{end_part}", len(start_part), None)
+                    for start_part, end_part, _, _ in self.check_mirror(address, settings["min_length"])]
+        if feature == "special_ending":
+            return [(ending, len(ending), f"ending at {pos}")
+                    for ending, pos in self.check_special_ending(address, settings["endings"])]
+        if feature == "special_beginning":
+            return [(beginning, len(beginning), f"starting at {pos}")
+                    for beginning, pos in self.check_special_beginning(address, settings["beginnings"])]
+        raise ValueError(f"Неизвестный тип паттерна: {feature}")
+    
+    def feature_vector(self, address: str, features: List[str] = FEATURE_TYPES) -> List[int]:
+        """Вектор признаков: суммарная длина находок каждого типа.
+        
+        Оценка адреса равна скалярному произведению вектора на weights(),
+        поэтому смена множителей не требует повторного анализа адресов.
+        """
+        return [sum(length for _, length, _ in self.find_matches(feature, address)) for feature in features]
+    
     def analyze_address(self, address: str) -> Dict[str, any]:
         """Полный анализ адреса на все паттерны"""
         analysis = {
             "address": address,
             "score": 0,
-            "patterns_found": []
+            "patterns_found": [],
+            "features": []
         }
         
-        # Проверяем повторяющиеся цифры
-        repeating_digits = self.check_repeating_digits(address)
-        if repeating_digits:
-            for pattern, start, end in repeating_digits:
-                analysis["patterns_found"].append({
-                    "type": "repeating_digits",
-                    "pattern": pattern,
-                    "position": f"{start}-{end}",
-                    "score": len(pattern) * 10
-                })
-                analysis["score"] += len(pattern) * 10
-        
-        # Проверяем повторяющиеся буквы
-        repeating_letters = self.check_repeating_letters(address)
-        if repeating_letters:
-            for pattern, start, end in repeating_letters:
-                analysis["patterns_found"].append({
-                    "type": "repeating_letters",
-                    "pattern": pattern,
-                    "position": f"{start}-{end}",
-                    "score": len(pattern) * 8
-                })
-                analysis["score"] += len(pattern) * 8
-        
-        # Проверяем последовательные цифры
-        sequential = self.check_sequential_digits(address)
-        if sequential:
-            for pattern, start, end in sequential:
-                analysis["patterns_found"].append({
-                    "type": "sequential_digits",
-                    "pattern": pattern,
-                    "position": f"{start}-{end}",
-                    "score": len(pattern) * 12
-                })
-                analysis["score"] += len(pattern) * 12
-        
-        # Проверяем слова
-        words = self.check_words(address)
-        if words:
-            for word, start, end in words:
-                analysis["patterns_found"].append({
-                    "type": "word",
-                    "pattern": word,
-                    "position": f"{start}-{end}",
-                    "score": len(word) * 15
-                })
-                analysis["score"] += len(word) * 15
-        
-        # Проверяем зеркальные паттерны
-        mirrors = self.check_mirror(address)
-        if mirrors:
-            for start_part, end_part, _, _ in mirrors:
-                analysis["patterns_found"].append({
-                    "type": "mirror",
-                    "pattern": f"{start_part}...{end_part}",
-                    "score": len(start_part) * 20
-                })
-                analysis["score"] += len(start_part) * 20
-        
-        # Проверяем специальные окончания
-        special_endings = self.check_special_ending(address)
-        if special_endings:
-            for ending, pos in special_endings:
-                analysis["patterns_found"].append({
-                    "type": "special_ending",
-                    "pattern": ending,
-                    "position": f"ending at {pos}",
-                    "score": len(ending) * 10
-                })
-                analysis["score"] += len(ending) * 10
-        
-        # Проверяем специальные начала
-        special_beginnings = self.check_special_beginning(address)
-        if special_beginnings:
-            for beginning, pos in special_beginnings:
-                analysis["patterns_found"].append({
-                    "type": "special_beginning",
-                    "pattern": beginning,
-                    "position": f"starting at {pos}",
-                    "score": len(beginning) * 10
-                })
-                analysis["score"] += len(beginning) * 10
+        for feature in FEATURE_TYPES:
+            multiplier = self.scoring[feature]["score_multiplier"]
+            units = 0
+            for pattern, length, position in self.find_matches(feature, address):
+                found = {"type": PATTERN_TYPE_NAMES[feature], "pattern": pattern}
+                if position is not None:
+                    found["position"] = position
+                found["score"] = length * multiplier
+                analysis["patterns_found"].append(found)
+                analysis["score"] += length * multiplier
+                units += length
+            analysis["features"].append(units)
         
         return analysis
     
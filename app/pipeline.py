@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Конвейер генерации адресов: generate -> encode -> score -> persist / report.
+
+Каждая стадия - отдельные процессы, связанные ограниченными очередями
+пачек. Запись на диск и вывод в консоль выполняются в своих стадиях,
+поэтому генерация ключей ждёт их только когда очереди заполнены целиком.
+Для каждой стадии доступны глубина входной очереди и время ожидания
+передачи пачки следующей стадии.
+"""
+import os
+import json
+import time
+import queue
+import signal
+import logging
+import multiprocessing
+from datetime import datetime
+from typing import Dict, List, Optional
+from pattern_matcher import PatternMatcher
+from key_backends import get_backend, payloads_to_addresses
+from machine_profile import DEFAULT_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+# Определяем базовую директорию (на уровень выше, так как этот файл в app/)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+ADDRESSES_DIR = os.path.join(BASE_DIR, "addresses")
+
+STAGES = ("generate", "encode", "score", "persist", "report")
+# Размер очередей между стадиями (в пачках)
+DEFAULT_QUEUE_SIZE = 64
+
+
+class StageStats:
+    """Общие для процессов стадии счетчики: обработано элементов и время ожидания передачи"""
+
+    def __init__(self):
+        self.processed = multiprocessing.Value('Q', 0)
+        self.stall = multiprocessing.Value('d', 0.0)
+
+    def done(self, count: int):
+        with self.processed.get_lock():
+            self.processed.value += count
+
+    def put(self, out, item):
+        """Передаёт пачку дальше; ожидание при полной очереди учитывается как простой стадии"""
+        try:
+            out.put_nowait(item)
+            return
+        except queue.Full:
+            pass
+        started = time.time()
+        out.put(item)
+        with self.stall.get_lock():
+            self.stall.value += time.time() - started
+
+
+class BeautifulLiveSink:
+    """
+    Запись красивых адресов в beautiful_live.txt/json и вывод в консоль.
+
+    Список из JSON читается один раз; файл переписывается целиком (через
+    временный файл) не чаще flush_interval, а не после каждого адреса.
+    """
+
+    def __init__(self, text_file: str, json_file: str, flush_interval: float, found=None):
+        self.text_file = text_file
+        self.json_file = json_file
+        self.flush_interval = flush_interval
+        self.found = found
+        try:
+            with open(json_file, 'r') as f:
+                self.beautiful_list = json.load(f)
+        except (OSError, ValueError):
+            self.beautiful_list = []
+        self.dirty = False
+        self.last_flush = time.time()
+
+    def write(self, hits: List[Dict]):
+        blocks = []
+        for hit in hits:
+            blocks.append(f"\n{'='*80}\n")
+            blocks.append(f"Найден: {hit['found_at'][:19].replace('T', ' ')}\n")
+            blocks.append(f"Адрес: {hit['address']}\n")
+            blocks.append(f"Приватный ключ: {hit['private_key']}\n")
+            blocks.append(f"Оценка: {hit['score']}\n")
+            blocks.append("Паттерны:\n")
+            for pattern in hit['patterns']:
+                blocks.append(f"  - {pattern['type']}: {pattern['pattern']} (score: {pattern['score']})\n")
+        with open(self.text_file, 'a') as f:
+            f.write("".join(blocks))
+
+        self.beautiful_list.extend(hits)
+        self.dirty = True
+        for hit in hits:
+            if self.found is not None:
+                with self.found.get_lock():
+                    self.found.value += 1
+            total = self.found.value if self.found is not None else len(self.beautiful_list)
+            print(f"\n🎉 НАЙДЕН КРАСИВЫЙ АДРЕС! (Score: {hit['score']})")
+            print(f"   Адрес: {hit['address']}")
+            patterns_str = ", ".join([f"{p['type']}:{p['pattern']}" for p in hit['patterns']])
+            print(f"   Паттерны: {patterns_str}")
+            print(f"   Всего найдено красивых: {total}\n")
+
+    def flush(self, force: bool = False):
+        if not self.dirty or (not force and time.time() - self.last_flush < self.flush_interval):
+            return
+        tmp_path = f"{self.json_file}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.beautiful_list, f, indent=2)
+        os.replace(tmp_path, self.json_file)
+        self.dirty = False
+        self.last_flush = time.time()
+
+
+# Функции стадий выполняются в отдельных процессах; None во входной очереди - конец работы
+
+def generate_stage(key_backend: str, batch_size: int, stop, out, stats: StageStats, generated=None):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    backend = get_backend(key_backend)
+    while not stop.is_set():
+        batch = backend.generate_payloads(batch_size)
+        stats.put(out, batch)
+        stats.done(batch_size)
+        if generated is not None:
+            with generated.get_lock():
+                generated.value += batch_size
+
+
+def encode_stage(inp, out, stats: StageStats):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    while True:
+        batch = inp.get()
+        if batch is None:
+            break
+        private_keys, payloads = batch
+        stats.put(out, list(zip(private_keys, payloads_to_addresses(payloads))))
+        stats.done(len(private_keys))
+
+
+def score_stage(patterns_file: Optional[str], min_score: int, save_all: bool,
+                inp, persist_out, report_out, stats: StageStats):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    matcher = PatternMatcher(patterns_file)
+    while True:
+        batch = inp.get()
+        if batch is None:
+            break
+        lines = []
+        hits = []
+        for private_key, address in batch:
+            analysis = matcher.analyze_address(address)
+            if analysis["score"] >= min_score:
+                hits.append({
+                    "found_at": datetime.now().isoformat(),
+                    "address": address,
+                    "private_key": private_key,
+                    "score": analysis["score"],
+                    "patterns": analysis["patterns_found"]
+                })
+            if save_all:
+                lines.append(f"Address: {address}, PrivateKey: {private_key}, Score: {analysis['score']}\n")
+        if hits:
+            stats.put(report_out, hits)
+        if lines:
+            stats.put(persist_out, (len(lines), "".join(lines)))
+        stats.done(len(batch))
+
+
+def persist_stage(worker_id: int, flush_interval: float, inp, stats: StageStats):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    filename = os.path.join(ADDRESSES_DIR, f"addresses_thread_{worker_id}.txt")
+    last_flush = time.time()
+    with open(filename, 'a') as f:
+        while True:
+            item = inp.get()
+            if item is None:
+                break
+            count, text = item
+            f.write(text)
+            if time.time() - last_flush >= flush_interval:
+                f.flush()
+                last_flush = time.time()
+            stats.done(count)
+
+
+def report_stage(flush_interval: float, inp, stats: StageStats, found=None):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    sink = BeautifulLiveSink(os.path.join(ADDRESSES_DIR, "beautiful_live.txt"),
+                             os.path.join(ADDRESSES_DIR, "beautiful_live.json"),
+                             flush_interval, found)
+    while True:
+        try:
+            hits = inp.get(timeout=max(flush_interval, 0.1))
+        except queue.Empty:
+            sink.flush()
+            continue
+        if hits is None:
+            break
+        sink.write(hits)
+        sink.flush()
+        stats.done(len(hits))
+    sink.flush(force=True)
+
+
+class Pipeline:
+    """
+    Конвейер генерации. Число процессов задаётся для каждой стадии отдельно
+    (persist - один файл addresses_thread_N.txt на процесс, report - всегда
+    один процесс, владеющий beautiful_live.*). При остановке генерация
+    прекращается, а остальные стадии дорабатывают уже полученные пачки.
+    """
+
+    def __init__(self, patterns_file: Optional[str] = None, min_score: int = 50, save_all: bool = True,
+                 key_backend: str = DEFAULT_SETTINGS["key_backend"],
+                 batch_size: int = DEFAULT_SETTINGS["batch_size"],
+                 flush_interval: float = DEFAULT_SETTINGS["flush_interval"],
+                 generate_workers: int = 1, encode_workers: int = 1, score_workers: int = 1,
+                 persist_workers: int = 1, queue_size: int = DEFAULT_QUEUE_SIZE,
+                 stop=None, generated=None, found=None):
+        # Стадия без процессов оставила бы очередь без потребителя, и конвейер бы завис
+        counts = {"generate": generate_workers, "encode": encode_workers, "score": score_workers,
+                  "queue_size": queue_size}
+        if save_all:
+            counts["persist"] = persist_workers
+        for name, count in counts.items():
+            if count < 1:
+                raise ValueError(f"Конвейер: {name} должно быть не меньше 1, получено {count}")
+        self.stop_event = stop or multiprocessing.Event()
+        self.save_all = save_all
+        self.started_at = time.time()
+        self.stats_by_stage = {stage: StageStats() for stage in STAGES}
+        # Входная очередь каждой стадии, кроме generate
+        self.queues = {stage: multiprocessing.Queue(queue_size) for stage in STAGES[1:]}
+        self.queue_size = queue_size
+        os.makedirs(ADDRESSES_DIR, exist_ok=True)
+
+        stats = self.stats_by_stage
+        queues = self.queues
+        plan = {
+            "generate": [(generate_stage, (key_backend, batch_size, self.stop_event, queues["encode"],
+                                           stats["generate"], generated))] * generate_workers,
+            "encode": [(encode_stage, (queues["encode"], queues["score"], stats["encode"]))] * encode_workers,
+            "score": [(score_stage, (patterns_file, min_score, save_all, queues["score"], queues["persist"],
+                                     queues["report"], stats["score"]))] * score_workers,
+            "persist": [(persist_stage, (i, flush_interval, queues["persist"], stats["persist"]))
+                        for i in range(1, persist_workers + 1)] if save_all else [],
+            "report": [(report_stage, (flush_interval, queues["report"], stats["report"], found))]
+        }
+        self.workers: Dict[str, List[multiprocessing.Process]] = {}
+        for stage in STAGES:
+            self.workers[stage] = []
+            for target, args in plan[stage]:
+                p = multiprocessing.Process(target=target, args=args, name=f"{stage}-{len(self.workers[stage]) + 1}")
+                p.start()
+                self.workers[stage].append(p)
+        logger.info("Конвейер запущен: " + ", ".join(f"{s}={len(self.workers[s])}" for s in STAGES))
+
+    def close(self):
+        """Останавливает генерацию и дожидается, пока стадии обработают очереди"""
+        self.stop_event.set()
+        try:
+            # Стадии завершаются по порядку: каждая получает по None на процесс,
+            # когда все её поставщики уже завершились
+            for p in self.workers["generate"]:
+                p.join()
+            for stage in ("encode", "score"):
+                for _ in self.workers[stage]:
+                    self.queues[stage].put(None)
+                for p in self.workers[stage]:
+                    p.join()
+            for stage in ("persist", "report"):
+                for _ in self.workers[stage]:
+                    self.queues[stage].put(None)
+            for stage in ("persist", "report"):
+                for p in self.workers[stage]:
+                    p.join()
+        except KeyboardInterrupt:
+            # Повторное прерывание: не ждём обработки очередей
+            self.terminate()
+            raise
+
+    def terminate(self):
+        """Немедленная остановка всех стадий; необработанные пачки теряются"""
+        self.stop_event.set()
+        for stage in STAGES:
+            for p in self.workers[stage]:
+                if p.is_alive():
+                    p.terminate()
+        for stage in STAGES:
+            for p in self.workers[stage]:
+                p.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def stats(self) -> Dict[str, Dict]:
+        """Статистика по стадиям: процессы, обработано, глубина входной очереди, время простоя"""
+        elapsed = time.time() - self.started_at
+        result = {}
+        for stage in STAGES:
+            stage_stats = self.stats_by_stage[stage]
+            depth = None
+            if stage in self.queues:
+                try:
+                    depth = self.queues[stage].qsize()
+                except NotImplementedError:
+                    depth = None
+            result[stage] = {
+                "workers": len(self.workers[stage]),
+                "processed": stage_stats.processed.value,
+                "speed": stage_stats.processed.value / elapsed if elapsed > 0 else 0,
+                "queue_depth": depth,
+                "queue_size": self.queue_size if stage in self.queues else None,
+                "stall_seconds": stage_stats.stall.value
+            }
+        return result
+
+    def print_stats(self):
+        print(f"   {'Стадия':<10}{'Процессов':>10}{'Обработано':>14}{'Очередь':>10}{'Простой, с':>12}")
+        for stage, s in self.stats().items():
+            if not s["workers"]:
+                continue
+            depth = "-" if s["queue_depth"] is None else f"{s['queue_depth']}/{s['queue_size']}"
+            print(f"   {stage:<10}{s['workers']:>10}{s['processed']:>14,}{depth:>10}{s['stall_seconds']:>12.1f}")
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+import os
+import json
+import heapq
+from typing import Dict, Iterable, List, Optional, Tuple
+from external_sort import ExternalSorter
+
+# Смещение для инвертирования оценки в ключе сортировки (больший score - раньше)
+SCORE_KEY_BASE = 10 ** 12
+
+
+class BeautifulResult:
+    """Компактная запись о найденном красивом адресе.
+
+    Паттерны хранятся кортежами (type, pattern, position, score) вместо
+    словарей, position равен None для паттернов без позиции (mirror).
+    """
+
+    __slots__ = ("file", "line", "address", "private_key", "score", "patterns")
+
+    def __init__(self, file: str, line: int, address: str, private_key: str,
+                 score: int, patterns: Tuple[Tuple, ...]):
+        self.file = file
+        self.line = line
+        self.address = address
+        self.private_key = private_key
+        self.score = score
+        self.patterns = patterns
+
+    @staticmethod
+    def compact_patterns(patterns_found: List[Dict]) -> Tuple[Tuple, ...]:
+        """Преобразует patterns_found из PatternMatcher в кортежи"""
+        return tuple(
+            (p["type"], p["pattern"], p.get("position"), p["score"])
+            for p in patterns_found
+        )
+
+    def patterns_as_dicts(self) -> List[Dict]:
+        """Возвращает паттерны в формате PatternMatcher.analyze_address"""
+        result = []
+        for ptype, pattern, position, score in self.patterns:
+            item = {"type": ptype, "pattern": pattern}
+            if position is not None:
+                item["position"] = position
+            item["score"] = score
+            result.append(item)
+        return result
+
+    def to_dict(self) -> Dict:
+        """Словарь в формате beautiful_addresses.json"""
+        return {
+            "file": self.file,
+            "line": self.line,
+            "address": self.address,
+            "private_key": self.private_key,
+            "score": self.score,
+            "patterns": self.patterns_as_dicts()
+        }
+
+    def to_row(self) -> list:
+        return [self.file, self.line, self.address, self.private_key, self.score,
+                [list(p) for p in self.patterns]]
+
+    @classmethod
+    def from_row(cls, row: list) -> "BeautifulResult":
+        file, line, address, private_key, score, patterns = row
+        return cls(file, line, address, private_key, score, tuple(tuple(p) for p in patterns))
+
+
+class ResultSummary:
+    """Сводка по результатам, собираемая за один проход с ограниченной памятью"""
+
+    def __init__(self, top_n: int = 10):
+        self.top_n = top_n
+        self.count = 0
+        self.pattern_stats: Dict[str, int] = {}
+        self._top: List[Tuple[int, int, BeautifulResult]] = []
+
+    def add(self, result: BeautifulResult):
+        seq = self.count
+        self.count += 1
+        for pattern in result.patterns:
+            ptype = pattern[0]
+            self.pattern_stats[ptype] = self.pattern_stats.get(ptype, 0) + 1
+
+        # При равной оценке выше стоит адрес, найденный раньше
+        entry = (result.score, -seq, result)
+        if len(self._top) < self.top_n:
+            heapq.heappush(self._top, entry)
+        elif entry[:2] > self._top[0][:2]:
+            heapq.heapreplace(self._top, entry)
+
+    def top(self) -> List[BeautifulResult]:
+        """Лучшие адреса по оценке (по убыванию)"""
+        return [entry[2] for entry in sorted(self._top, key=lambda e: e[:2], reverse=True)]
+
+
+class StreamingResultWriter:
+    """Потоковая запись результатов в JSON и текстовый отчёт.
+
+    JSON пишется по мере поступления записей, а для текстового отчёта,
+    отсортированного по оценке, записи сбрасываются на диск отрезками и
+    сливаются внешней сортировкой. Пиковая память ограничена run_size
+    записями независимо от объёма входных данных.
+    """
+
+    def __init__(self, output_path: str, run_size: int = 100000):
+        self.output_path = output_path
+        self.json_file = output_path.replace('.txt', '.json')
+        self.run_size = run_size
+        self.summary = ResultSummary()
+        self._json_tmp = self.json_file + ".tmp"
+        self._json_handle = None
+        self._sorter: Optional[ExternalSorter] = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def open(self):
+        os.makedirs(os.path.dirname(self.output_path), exist_ok=True)
+        self._json_handle = open(self._json_tmp, 'w', encoding='utf-8')
+        self._sorter = ExternalSorter(self.run_size, tmp_dir=os.path.dirname(self.output_path))
+
+    def write(self, result: BeautifulResult):
+        """Добавляет одну запись"""
+        seq = self.summary.count
+        self.summary.add(result)
+
+        # Формат совпадает с json.dump(results, indent=2)
+        item = json.dumps(result.to_dict(), indent=2, ensure_ascii=False)
+        self._json_handle.write("[\n  " if seq == 0 else ",\n  ")
+        self._json_handle.write(item.replace("\n", "\n  "))
+
+        payload = json.dumps(result.to_row(), ensure_ascii=False)
+        self._sorter.add(f"{SCORE_KEY_BASE - result.score:013d}\t{seq:012d}\t{payload}")
+
+    def write_all(self, results: Iterable[BeautifulResult]) -> ResultSummary:
+        for result in results:
+            self.write(result)
+        return self.summary
+
+    def _write_text_report(self):
+        with open(self.output_path, 'w', encoding='utf-8') as f:
+            f.write(f"Найдено красивых адресов: {self.summary.count}\n")
+            f.write("=" * 80 + "\n\n")
+
+            for i, line in enumerate(self._sorter.sorted_lines(), 1):
+                result = BeautifulResult.from_row(json.loads(line.split("\t", 2)[2]))
+                f.write(f"#{i} Адрес: {result.address}\n")
+                f.write(f"Приватный ключ: {result.private_key}\n")
+                f.write(f"Оценка: {result.score}\n")
+                f.write(f"Файл: {result.file}, строка: {result.line}\n")
+                f.write("Найденные паттерны:\n")
+                for ptype, pattern, _, score in result.patterns:
+                    f.write(f"  - {ptype}: {pattern} (score: {score})\n")
+                f.write("-" * 80 + "\n\n")
+
+    def close(self):
+        """Завершает запись; при отсутствии результатов файлы не создаются"""
+        try:
+            if self.summary.count == 0:
+                self._json_handle.close()
+                os.remove(self._json_tmp)
+                return
+            self._json_handle.write("\n]")
+            self._json_handle.close()
+            os.replace(self._json_tmp, self.json_file)
+            self._write_text_report()
+        finally:
+            self._sorter.cleanup()
+
+    def abort(self):
+        """Прерывает запись и удаляет временные файлы"""
+        if self._json_handle and not self._json_handle.closed:
+            self._json_handle.close()
+        if os.path.exists(self._json_tmp):
+            os.remove(self._json_tmp)
+        if self._sorter:
+            self._sorter.cleanup()
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Встраиваемый API поиска адресов без файлов и дочерних скриптов.
+
+    from search_api import search
+
+    with search(targets={"suffix": "Netts"}, workers=4) as session:
+        for hit in session:
+            print(hit.address, hit.private_key)
+
+    async for hit in search(min_score=100, max_results=5):
+        ...
+"""
+import os
+import copy
+import time
+import queue
+import signal
+import asyncio
+import threading
+import multiprocessing
+from typing import Dict, List, Optional, Union
+from pattern_matcher import PatternMatcher, VanityTarget
+from machine_profile import DEFAULT_SETTINGS, load_settings
+from address_generator_v2 import AddressGeneratorV2
+from key_backends import get_backend
+
+ENGINES = ("thread", "process")
+# Интервал, с которым ожидающие операции проверяют отмену
+POLL_INTERVAL = 0.2
+
+TargetSpec = Union[VanityTarget, Dict, str]
+
+
+class SearchStopped(Exception):
+    """Поиск остановлен: отменён или набрано max_results"""
+
+
+class SearchError(RuntimeError):
+    """Все воркеры поиска завершились (ошибка генерации)"""
+
+
+class SearchHit:
+    """Найденный адрес"""
+
+    __slots__ = ("address", "private_key", "score", "patterns", "targets", "found_at")
+
+    def __init__(self, address: str, private_key: str, score: Optional[int],
+                 patterns: Optional[List[Dict]], targets: List[int], found_at: float):
+        self.address = address
+        self.private_key = private_key
+        self.score = score
+        self.patterns = patterns
+        # Индексы целей из search(targets=...), которым подходит адрес
+        self.targets = targets
+        self.found_at = found_at
+
+    def __repr__(self):
+        return f"SearchHit({self.address!r}, score={self.score})"
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class StreamingGenerator(AddressGeneratorV2):
+    """AddressGeneratorV2, который отдаёт найденные адреса в ограниченную очередь вместо файлов"""
+
+    def __init__(self, matcher: PatternMatcher, targets: List[VanityTarget], hits, stop, counter, stall,
+                 key_backend: Optional[str] = None):
+        super().__init__(matcher, persist=False, key_backend=get_backend(key_backend) if key_backend else None)
+        self.targets = targets
+        self.needs_score = any(target.needs_score for target in targets)
+        self.hits = hits
+        self.stop = stop
+        self.counter = counter
+        self.stall = stall
+
+    def evaluate(self, address: str) -> Optional[dict]:
+        # Анализ паттернов нужен только целям с min_score
+        return self.matcher.analyze_address(address) if self.needs_score else None
+
+    def is_hit(self, address: str, analysis: Optional[dict]) -> bool:
+        score = analysis["score"] if analysis else None
+        return any(target.matches(address, score) for target in self.targets)
+
+    def handle_hit(self, address: str, private_key: str, analysis: Optional[dict]):
+        score = analysis["score"] if analysis else None
+        hit = SearchHit(
+            address,
+            private_key,
+            score,
+            analysis["patterns_found"] if analysis else None,
+            [i for i, target in enumerate(self.targets) if target.matches(address, score)],
+            time.time()
+        )
+        # Полная очередь останавливает генерацию (backpressure), пока потребитель не заберёт адреса
+        while not self.stop.is_set():
+            started = time.time()
+            try:
+                self.hits.put(hit, timeout=POLL_INTERVAL)
+                return
+            except queue.Full:
+                pass
+            finally:
+                with self.stall.get_lock():
+                    self.stall.value += time.time() - started
+
+
+def _process_main(generator: StreamingGenerator, thread_id: int, batch_size: int):
+    # Прерывание обрабатывает процесс-владелец сессии
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    generator.worker(thread_id, False, batch_size)
+
+
+def _coerce_target(target: TargetSpec) -> VanityTarget:
+    if isinstance(target, VanityTarget):
+        # Копия: min_score из search() не должен менять объект вызывающего кода
+        return copy.copy(target)
+    if isinstance(target, str):
+        return VanityTarget(suffix=target)
+    return VanityTarget.from_dict(target)
+
+
+class SearchSession:
+    """
+    Сессия поиска: итератор и асинхронный итератор найденных адресов.
+
+    Найденные адреса проходят через очередь размером queue_size; если
+    потребитель не успевает, воркеры ждут, а не копят адреса в памяти.
+    """
+
+    def __init__(self, targets: List[VanityTarget], engine: str, workers: int,
+                 patterns_file: Optional[str], queue_size: int, batch_size: int,
+                 max_results: Optional[int], key_backend: Optional[str] = None):
+        if engine not in ENGINES:
+            raise ValueError(f"Неизвестный engine {engine!r}, доступны: {', '.join(ENGINES)}")
+        self.engine = engine
+        self.max_results = max_results
+        self.delivered = 0
+        self.started_at = time.time()
+        self.counter = multiprocessing.Value('Q', 0)
+        self.stall = multiprocessing.Value('d', 0.0)
+        if engine == "process":
+            self.stop = multiprocessing.Event()
+            self.hits = multiprocessing.Queue(queue_size)
+        else:
+            self.stop = threading.Event()
+            self.hits = queue.Queue(queue_size)
+
+        generator = StreamingGenerator(PatternMatcher(patterns_file), targets,
+                                       self.hits, self.stop, self.counter, self.stall, key_backend)
+        self.workers = []
+        for i in range(1, workers + 1):
+            if engine == "process":
+                w = multiprocessing.Process(target=_process_main, args=(generator, i, batch_size), daemon=True)
+            else:
+                w = threading.Thread(target=generator.worker, args=(i, False, batch_size), daemon=True)
+            w.start()
+            self.workers.append(w)
+
+    @property
+    def running(self) -> bool:
+        return not self.stop.is_set()
+
+    def cancel(self):
+        """Останавливает поиск; уже ожидающие в очереди адреса отбрасываются"""
+        self.stop.set()
+
+    def close(self, timeout: float = 5.0):
+        """Останавливает поиск и дожидается воркеров"""
+        self.cancel()
+        for w in self.workers:
+            w.join(timeout)
+            if isinstance(w, multiprocessing.Process) and w.is_alive():
+                w.terminate()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def stats(self) -> Dict:
+        """Текущая статистика сессии"""
+        elapsed = time.time() - self.started_at
+        try:
+            depth = self.hits.qsize()
+        except NotImplementedError:
+            depth = None
+        return {
+            "engine": self.engine,
+            "workers": len(self.workers),
+            "running": self.running,
+            "elapsed": elapsed,
+            "generated": self.counter.value,
+            "speed": self.counter.value / elapsed if elapsed > 0 else 0,
+            "delivered": self.delivered,
+            "queue_depth": depth,
+            "backpressure_seconds": self.stall.value
+        }
+
+    def next_hit(self, timeout: Optional[float] = None) -> Optional[SearchHit]:
+        """
+        Следующий адрес; None по таймауту. SearchStopped после отмены или
+        max_results, SearchError, если все воркеры завершились.
+        """
+        deadline = time.time() + timeout if timeout is not None else None
+        while self.running:
+            wait = POLL_INTERVAL if deadline is None else min(POLL_INTERVAL, deadline - time.time())
+            if wait <= 0:
+                return None
+            try:
+                hit = self.hits.get(timeout=wait)
+            except queue.Empty:
+                # Воркер, у которого упала генерация, завершается; без воркеров ждать нечего
+                if self.running and not any(w.is_alive() for w in self.workers):
+                    self.cancel()
+                    raise SearchError("Все воркеры поиска завершились, подробности в логе")
+                continue
+            if not self.running:
+                break
+            self.delivered += 1
+            if self.max_results is not None and self.delivered >= self.max_results:
+                self.cancel()
+            return hit
+        raise SearchStopped()
+
+    def __iter__(self):
+        try:
+            while True:
+                try:
+                    hit = self.next_hit()
+                except SearchStopped:
+                    return
+                if hit is not None:
+                    yield hit
+        finally:
+            if self.max_results is not None and self.delivered >= self.max_results:
+                self.close()
+
+    async def _aiter(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    hit = await loop.run_in_executor(None, self.next_hit, POLL_INTERVAL)
+                except SearchStopped:
+                    return
+                if hit is not None:
+                    yield hit
+        finally:
+            self.cancel()
+
+    def __aiter__(self):
+        return self._aiter()
+
+
+def search(targets: Union[TargetSpec, List[TargetSpec], None] = None, min_score: Optional[int] = None,
+           engine: str = "process", workers: Optional[int] = None, patterns_file: Optional[str] = None,
+           queue_size: int = 1024, batch_size: Optional[int] = None,
+           max_results: Optional[int] = None, key_backend: Optional[str] = None) -> SearchSession:
+    """
+    Запускает поиск адресов и возвращает сессию.
+
+    targets - одна цель или список: VanityTarget, словарь в формате
+    VanityTarget.from_dict или строка (окончание адреса). Адрес подходит,
+    если подходит хотя бы одной цели. Без targets ищутся адреса с оценкой
+    не ниже min_score. engine: "process" (по процессу на воркер) или
+    "thread" (потоки в текущем процессе). workers, batch_size и key_backend
+    ("tronpy" или "table") по умолчанию берутся из профиля машины.
+    """
+    if targets is None:
+        if min_score is None:
+            raise ValueError("Нужно задать targets или min_score")
+        target_list = [VanityTarget(min_score=min_score)]
+    else:
+        if not isinstance(targets, list):
+            targets = [targets]
+        target_list = [_coerce_target(t) for t in targets]
+        if min_score is not None:
+            for target in target_list:
+                target.min_score = min_score if target.min_score is None else target.min_score
+
+    # Без перепроверки: библиотечный вызов не должен запускать калибровку и переписывать профиль
+    settings = load_settings(revalidate=False) or {}
+    workers = workers or settings.get("processes") or os.cpu_count() or 1
+    batch_size = batch_size or settings.get("batch_size") or DEFAULT_SETTINGS["batch_size"]
+    key_backend = key_backend or settings.get("key_backend") or DEFAULT_SETTINGS["key_backend"]
+    return SearchSession(target_list, engine, workers, patterns_file, queue_size, batch_size,
+                         max_results, key_backend)
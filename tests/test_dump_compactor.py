@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Сжатие дампов в сегменты и поиск по ним: python3 -m unittest discover tests"""
+import io
+import os
+import sys
+import random
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "app"))
+
+import dump_compactor  # noqa: E402
+from dump_compactor import SegmentStore, compact, is_valid_record, shard_of  # noqa: E402
+from key_backends import BASE58_ALPHABET  # noqa: E402
+
+SHARDS = 4
+# Маленький интервал индекса, чтобы поиск проходил через несколько блоков сегмента
+INDEX_INTERVAL = 4
+
+
+def random_address(rng: random.Random) -> str:
+    return "T" + "".join(rng.choice(BASE58_ALPHABET) for _ in range(33))
+
+
+def random_key(rng: random.Random) -> str:
+    return "".join(rng.choice("0123456789abcdef") for _ in range(64))
+
+
+class DumpCompactorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp(prefix="segments_test_")
+        self.segments = os.path.join(self.tmp_dir, "segments")
+        self.rng = random.Random(1)
+        patcher = mock.patch.object(dump_compactor, "INDEX_INTERVAL", INDEX_INTERVAL)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def write_dump(self, name: str, pairs, extra_lines=()) -> str:
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            for address, private_key in pairs:
+                f.write(f"Address: {address}, PrivateKey: {private_key}\n")
+            for line in extra_lines:
+                f.write(line + "\n")
+        return path
+
+    def make_pairs(self, count: int):
+        return [(random_address(self.rng), random_key(self.rng)) for _ in range(count)]
+
+    def build(self, files, **kwargs):
+        with redirect_stdout(io.StringIO()):
+            return compact(files, self.segments, SHARDS, run_size=50, **kwargs)
+
+    def test_is_valid_record(self):
+        address, private_key = self.make_pairs(1)[0]
+        self.assertTrue(is_valid_record(address, private_key))
+        self.assertFalse(is_valid_record(address[:-1] + "0", private_key))
+        self.assertFalse(is_valid_record("TÖ" + address[2:], private_key))
+        self.assertFalse(is_valid_record(address, private_key[:-1] + "g"))
+        self.assertFalse(is_valid_record(address[1:] + "A", private_key))
+
+    def test_lookup_every_record(self):
+        pairs = self.make_pairs(300)
+        stats = self.build([self.write_dump("addresses_1.txt", pairs)])
+        self.assertEqual(stats.written, len(pairs))
+
+        store = SegmentStore(self.segments)
+        self.assertEqual(store.count, len(pairs))
+        for address, private_key in pairs:
+            self.assertEqual(store.lookup(address), private_key)
+
+    def test_lookup_missing(self):
+        pairs = self.make_pairs(100)
+        self.build([self.write_dump("addresses_1.txt", pairs)])
+        store = SegmentStore(self.segments)
+        for address in ("T" + "1" * 33, "T" + "z" * 33, random_address(self.rng), "TÖ" + "1" * 32, "Tshort"):
+            self.assertIsNone(store.lookup(address))
+
+    def test_segments_sorted_by_shard(self):
+        self.build([self.write_dump("addresses_1.txt", self.make_pairs(200))])
+        store = SegmentStore(self.segments)
+        for shard in range(SHARDS):
+            addresses = [address for address, _ in store.iter_shard(shard)]
+            self.assertEqual(addresses, sorted(set(addresses)))
+            self.assertTrue(all(shard_of(address, SHARDS) == shard for address in addresses))
+
+    def test_duplicates_and_conflicts(self):
+        pairs = self.make_pairs(50)
+        address, _ = pairs[0]
+        dump = self.write_dump("addresses_1.txt", pairs + pairs[1:11] + [(address, random_key(self.rng))])
+        stats = self.build([dump])
+        self.assertEqual(stats.written, len(pairs))
+        self.assertEqual(stats.duplicates, 11)
+        self.assertEqual(stats.conflicts, 1)
+
+    def test_malformed_lines(self):
+        pairs = self.make_pairs(20)
+        bad_address = "TÖ" + pairs[0][0][2:]
+        dump = self.write_dump("addresses_1.txt", pairs, [
+            f"Address: {bad_address}, PrivateKey: {pairs[0][1]}",
+            "Address: T123, PrivateKey: 00",
+            "мусор"
+        ])
+        stats = self.build([dump])
+        self.assertEqual(stats.malformed, 3)
+        self.assertEqual(stats.written, len(pairs))
+        self.assertFalse(os.path.exists(f"{self.segments}.tmp"))
+
+    def test_merge_with_existing_archive(self):
+        first = self.make_pairs(120)
+        second = self.make_pairs(80) + first[:30]
+        first_dump = self.write_dump("addresses_1.txt", first)
+        self.build([first_dump])
+
+        stats = self.build([first_dump, self.write_dump("addresses_2.txt", second)])
+        self.assertEqual(stats.skipped_files, 1)
+        self.assertEqual(stats.files, 1)
+        self.assertEqual(stats.existing, len(first))
+        self.assertEqual(stats.duplicates, 30)
+        self.assertEqual(stats.written, len(first) + 80)
+
+        store = SegmentStore(self.segments)
+        self.assertEqual(len(store.sources), 2)
+        for address, private_key in first + second:
+            self.assertEqual(store.lookup(address), private_key)
+
+    def test_failed_build_keeps_archive(self):
+        pairs = self.make_pairs(40)
+        self.build([self.write_dump("addresses_1.txt", pairs)])
+        with self.assertRaises(OSError):
+            self.build([self.write_dump("addresses_2.txt", self.make_pairs(10)),
+                        os.path.join(self.tmp_dir, "missing.txt")])
+        self.assertFalse(os.path.exists(f"{self.segments}.tmp"))
+        store = SegmentStore(self.segments)
+        self.assertEqual(store.count, len(pairs))
+        self.assertEqual(store.lookup(pairs[0][0]), pairs[0][1])
+
+
+if __name__ == "__main__":
+    unittest.main()
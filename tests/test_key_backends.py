@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Сверка TableBackend с tronpy: python3 -m unittest discover tests"""
+import os
+import sys
+import secrets
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "app"))
+
+from key_backends import GX, GY, N, TableBackend  # noqa: E402
+
+try:
+    from tronpy.keys import PrivateKey
+except ImportError:
+    PrivateKey = None
+
+# Граничные ключи: младшие кратные, границы первого окна и максимальный ключ
+EDGE_KEYS = [1, 2, 255, 256, N - 1]
+
+
+@unittest.skipIf(PrivateKey is None, "tronpy не установлен")
+class TableBackendTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.mkdtemp(prefix="g_table_")
+        cls.backend = TableBackend(os.path.join(cls.tmp_dir, "g_table_w8.bin"))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.backend.table.close()
+        shutil.rmtree(cls.tmp_dir, ignore_errors=True)
+
+    def assert_public_keys_match(self, keys):
+        for k, public_key in zip(keys, self.backend.public_keys(keys)):
+            expected = PrivateKey(k.to_bytes(32, 'big')).public_key.to_bytes()
+            self.assertEqual(public_key, expected, f"ключ {k:064x}")
+
+    def test_generator_point(self):
+        self.assertEqual(self.backend.public_keys([1])[0],
+                         GX.to_bytes(32, 'big') + GY.to_bytes(32, 'big'))
+
+    def test_edge_keys(self):
+        self.assert_public_keys_match(EDGE_KEYS)
+
+    def test_random_keys(self):
+        self.assert_public_keys_match([secrets.randbelow(N - 1) + 1 for _ in range(200)])
+
+    def test_generate_addresses(self):
+        pairs = self.backend.generate_addresses(200)
+        self.assertEqual(len(pairs), 200)
+        for private_key, address in pairs:
+            expected = PrivateKey(bytes.fromhex(private_key)).public_key.to_base58check_address()
+            self.assertEqual(address, expected)
+
+    def test_generate_payloads(self):
+        private_keys, payloads = self.backend.generate_payloads(50)
+        for private_key, payload in zip(private_keys, payloads):
+            self.assertEqual(payload, PrivateKey(bytes.fromhex(private_key)).public_key.to_address())
+
+    def test_pickle_reopens_table(self):
+        import pickle
+        clone = pickle.loads(pickle.dumps(self.backend))
+        try:
+            self.assertEqual(clone.public_keys(EDGE_KEYS), self.backend.public_keys(EDGE_KEYS))
+        finally:
+            clone.table.close()
+
+
+if __name__ == "__main__":
+    unittest.main()